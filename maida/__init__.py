@@ -1,14 +1,19 @@
 """Maida: pre-merge behavioral regression gate for AI agents."""
 
+import importlib
+from typing import TYPE_CHECKING
+
 from maida.exceptions import GuardrailExceeded, LoopAbort
-from maida.tracing import (
-    has_active_run,
-    record_llm_call,
-    record_state,
-    record_tool_call,
-    trace,
-    traced_run,
-)
+
+if TYPE_CHECKING:
+    from maida.tracing import (
+        has_active_run,
+        record_llm_call,
+        record_state,
+        record_tool_call,
+        trace,
+        traced_run,
+    )
 
 try:
     from maida._version import version as __version__
@@ -16,6 +21,16 @@ except ImportError:
     # No version file was venerated; use dev default
     __version__ = "0.0.0dev+default"
 
+# Tracing pulls in storage, config (YAML) and redaction; load it on first use.
+__lazy_imports__ = {
+    "trace": ("maida.tracing", "trace"),
+    "traced_run": ("maida.tracing", "traced_run"),
+    "has_active_run": ("maida.tracing", "has_active_run"),
+    "record_llm_call": ("maida.tracing", "record_llm_call"),
+    "record_tool_call": ("maida.tracing", "record_tool_call"),
+    "record_state": ("maida.tracing", "record_state"),
+}
+
 __all__ = [
     "GuardrailExceeded",
     "LoopAbort",
@@ -27,3 +42,20 @@ __all__ = [
     "record_state",
     "__version__",
 ]
+
+
+def __getattr__(name: str):
+    """Lazy load the tracing API so `import maida` stays cheap."""
+    if name not in __lazy_imports__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module_name, attr_name = __lazy_imports__[name]
+    module = importlib.import_module(module_name)
+    value = module if attr_name is None else getattr(module, attr_name)
+
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -11,12 +11,18 @@ from contextlib import contextmanager
 from functools import wraps
 from typing import Any, Callable, Generator, ParamSpec, TypeVar
 
-from maida.config import load_config
+from maida.config import get_config
 from maida.constants import default_counts
 from maida.events import EventType, new_event
 from maida.exceptions import GuardrailExceeded, _MaidaAbortSignal
 from maida.guardrails import GuardrailParams, merge_guardrail_params
-from maida.storage import append_event, create_run, finalize_run
+from maida.storage import (
+    append_event,
+    close_events_file,
+    create_run,
+    finalize_run,
+    open_events_file,
+)
 
 from maida._tracing._context import (
     _append_event_and_check_guardrails,
@@ -90,11 +96,13 @@ def _run_context(
             yield
         return
 
-    config = load_config()
+    config = get_config()
     params = guardrail_params if guardrail_params is not None else config.guardrails
     run_name = _resolve_run_name(name, func)
     meta = create_run(run_name, config)
     run_id = meta["run_id"]
+    # Hold events.jsonl open for the run instead of reopening/fsyncing per event.
+    open_events_file(run_id, config)
     started_at = meta["started_at"]
     counts = default_counts()
 
@@ -119,6 +127,7 @@ def _run_context(
         payload_end = _run_end_payload(status, counts, started_at)
         ev_end = new_event(EventType.RUN_END, run_id, "run_end", payload_end)
         append_event(run_id, ev_end, config)
+        close_events_file(run_id)
         finalize_run(run_id, status, counts, config)
 
     try:
@@ -155,6 +164,8 @@ def _run_context(
     else:
         _finish_run("ok")
     finally:
+        # Already closed by _finish_run unless a BaseException (e.g. SystemExit) skipped it.
+        close_events_file(run_id)
         _run_id_var.reset(token_run)
         _counts_var.reset(token_counts)
         _config_var.reset(token_config)
@@ -188,7 +199,7 @@ def trace(
 
     def decorator(func: Callable[P, R], explicit: str | None = None) -> Callable[P, R]:
         _name = explicit if explicit is not None else name
-        config = load_config()
+        config = get_config()
         base = config.guardrails
         kw: dict[str, Any] = {}
         if stop_on_loop is not None:
@@ -246,7 +257,7 @@ def traced_run(
     creating a new run. Run name precedence: MAIDA_RUN_NAME env, then name, then default.
     Guardrail kwargs override config; see SPEC §13.
     """
-    config = load_config()
+    config = get_config()
     kw: dict[str, Any] = {}
     if stop_on_loop is not None:
         kw["stop_on_loop"] = stop_on_loop
@@ -3,6 +3,7 @@ Pure redaction and truncation utilities.
 Only depends on maida.constants and maida.config (for MaidaConfig type).
 """
 
+import functools
 import re
 import traceback
 from typing import Any
@@ -14,10 +15,25 @@ from maida.constants import DEPTH_LIMIT, REDACTED_MARKER, TRUNCATED_MARKER
 _RECURSION_LIMIT = DEPTH_LIMIT
 
 
-def _key_matches_redact(key: str, redact_keys: list[str]) -> bool:
-    """True if key matches any redact key (case-insensitive substring)."""
-    k = key.lower()
-    return any(rk.lower() in k for rk in redact_keys)
+@functools.lru_cache(maxsize=16)
+def _compile_redact_keys(keys: tuple[str, ...]) -> re.Pattern[str] | None:
+    """Single regex matching any key as a case-insensitive substring; None if no keys."""
+    # Blank keys are dropped (they would match every field name); duplicates once.
+    keys = tuple(dict.fromkeys(k.strip().lower() for k in keys if k.strip()))
+    if not keys:
+        return None
+    return re.compile("|".join(re.escape(k) for k in keys), re.IGNORECASE)
+
+
+def _redact_keys_pattern(config: MaidaConfig) -> re.Pattern[str] | None:
+    """Pattern for config.redact_keys as they are now (compiled once per distinct key set)."""
+    return _compile_redact_keys(tuple(config.redact_keys))
+
+
+def _key_matches_redact(key: str, config: MaidaConfig) -> bool:
+    """True if key matches any of config.redact_keys (case-insensitive substring)."""
+    pattern = _redact_keys_pattern(config)
+    return pattern is not None and pattern.search(key) is not None
 
 
 # Matches --option=value or -o=value (option name can have letters, digits, hyphens, underscores).
@@ -38,7 +54,7 @@ def _redact_argv(argv: list[str], config: MaidaConfig) -> list[str]:
         if match:
             prefix, key, _value = match.groups()
             key_normalized = key.replace("-", "_")
-            if _key_matches_redact(key_normalized, config.redact_keys):
+            if _key_matches_redact(key_normalized, config):
                 out.append(f"{prefix}{key}={REDACTED_MARKER}")
                 continue
         out.append(item)
@@ -68,6 +84,18 @@ def _redact_and_truncate(
     Recursively redact keys matching config.redact_keys and truncate large strings.
     Limit recursion to _RECURSION_LIMIT. Returns a new structure; does not mutate input.
     """
+    # Look the key pattern up once per payload, not once per dict key.
+    pattern = _redact_keys_pattern(config) if config.redact else None
+    return _redact_walk(obj, config, pattern, depth)
+
+
+def _redact_walk(
+    obj: Any,
+    config: MaidaConfig,
+    pattern: re.Pattern[str] | None,
+    depth: int,
+) -> Any:
+    """Recursive step of _redact_and_truncate; keys matching pattern are redacted."""
     if depth > _RECURSION_LIMIT:
         return TRUNCATED_MARKER
     if obj is None or isinstance(obj, (bool, int, float)):
@@ -78,13 +106,13 @@ def _redact_and_truncate(
         out: dict[str, Any] = {}
         for k, v in obj.items():
             key_str = str(k)
-            if config.redact and _key_matches_redact(key_str, config.redact_keys):
+            if pattern is not None and pattern.search(key_str) is not None:
                 out[key_str] = REDACTED_MARKER
             else:
-                out[key_str] = _redact_and_truncate(v, config, depth + 1)
+                out[key_str] = _redact_walk(v, config, pattern, depth + 1)
         return out
     if isinstance(obj, (list, tuple)):
-        return [_redact_and_truncate(item, config, depth + 1) for item in obj]
+        return [_redact_walk(item, config, pattern, depth + 1) for item in obj]
     s = str(obj)
     return (
         _truncate_string(s, config.max_field_bytes)
@@ -1,9 +1,11 @@
 """Configuration for Maida: redaction, loop detection, guardrails, and data directory."""
 
+import functools
 import os
-from dataclasses import dataclass
+import stat
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 from maida.guardrails import GuardrailParams
 from maida.constants import LOCAL_DIR_NAME
@@ -13,6 +15,11 @@ try:
 except ImportError:
     yaml = None  # type: ignore[assignment]
 
+# libyaml-backed loader when PyYAML was built with it; same safe semantics otherwise.
+_YamlSafeLoader: Any = None
+if yaml is not None:
+    _YamlSafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 # Defaults (mirror env defaults)
 _DEFAULT_REDACT = True
 _DEFAULT_REDACT_KEYS = [
@@ -26,6 +33,10 @@ _DEFAULT_REDACT_KEYS = [
 _DEFAULT_MAX_FIELD_BYTES = 20000
 _DEFAULT_LOOP_WINDOW = 12
 _DEFAULT_LOOP_REPETITIONS = 3
+_DEFAULT_STORAGE = "file"
+
+# "file": runs under data_dir/runs; "memory": kept in process memory only (tests, throwaway runs).
+_STORAGE_BACKENDS = ("file", "memory")
 
 _MIN_MAX_FIELD_BYTES = 100
 _MIN_LOOP_WINDOW = 4
@@ -43,53 +54,131 @@ class MaidaConfig:
     loop_repetitions: int
     data_dir: Path
     guardrails: GuardrailParams
+    storage: str = _DEFAULT_STORAGE
+
+
+@functools.lru_cache(maxsize=16)
+def _load_yaml_cached(path_str: str, mtime_ns: int, size: int) -> dict[str, Any]:
+    """
+    Parse a YAML file once per (path, mtime_ns, size).
+
+    The returned dict is shared between callers and must not be mutated.
+    """
+    try:
+        with open(path_str, encoding="utf-8") as f:
+            data = yaml.load(f, Loader=_YamlSafeLoader)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
 
 
 def _load_yaml(path: Path) -> dict[str, Any]:
     """Load YAML from path. Return {} if file missing, invalid, or yaml unavailable."""
     if yaml is None:
         return {}
-    if not path.is_file():
-        return {}
     try:
-        with open(path, encoding="utf-8") as f:
-            data = yaml.safe_load(f)
-        return data if isinstance(data, dict) else {}
-    except Exception:
+        st = path.stat()
+    except OSError:
+        return {}
+    if not stat.S_ISREG(st.st_mode):
         return {}
+    return _load_yaml_cached(str(path), st.st_mtime_ns, st.st_size)
+
+
+def _yaml_bool(val: Any) -> bool:
+    """YAML redact: any non-null value, coerced with bool()."""
+    if val is None:
+        raise ValueError("null")
+    return bool(val)
+
+
+def _yaml_str_list(val: Any) -> list[str]:
+    """YAML redact_keys: a list of strings."""
+    if isinstance(val, list) and all(isinstance(x, str) for x in val):
+        return list(val)
+    raise ValueError("expected a list of strings")
+
+
+def _yaml_path(val: Any) -> Path:
+    """YAML data_dir: a string or Path."""
+    if isinstance(val, (str, Path)):
+        return Path(val)
+    raise ValueError("expected a path")
+
+
+_ENV_TRUE_VALUES = frozenset({"1", "true", "yes", "on"})
+
+
+def _env_bool(val: str) -> bool:
+    """Env flag: 1/true/yes/on (case-insensitive) is True, anything else False."""
+    return val.strip().lower() in _ENV_TRUE_VALUES
 
 
-def _apply_yaml(config: dict[str, Any], key: str, default: Any) -> Any:
-    """Get value from config dict if present and valid; else return default."""
-    if key not in config:
-        return default
-    val = config[key]
-    if key == "redact":
-        return bool(val) if val is not None else default
-    if key == "redact_keys":
-        if isinstance(val, list) and all(isinstance(x, str) for x in val):
-            return list(val)
-        return default
-    if key == "max_field_bytes":
-        try:
-            return max(_MIN_MAX_FIELD_BYTES, int(val))
-        except (TypeError, ValueError):
-            return default
-    if key == "loop_window":
-        try:
-            return max(_MIN_LOOP_WINDOW, int(val))
-        except (TypeError, ValueError):
-            return default
-    if key == "loop_repetitions":
-        try:
-            return max(_MIN_LOOP_REPETITIONS, int(val))
-        except (TypeError, ValueError):
-            return default
-    if key == "data_dir":
-        if val is None:
-            return default
-        return Path(val) if isinstance(val, (str, Path)) else default
-    return default
+def _env_csv(val: str) -> list[str]:
+    """Env list: comma-separated, blanks dropped."""
+    return [k.strip() for k in val.split(",") if k.strip()]
+
+
+def _env_path(val: str) -> Path:
+    """Env data_dir: non-empty path, ~ expanded."""
+    val = val.strip()
+    if not val:
+        raise ValueError("empty path")
+    return Path(val).expanduser()
+
+
+def _storage_backend(val: Any) -> str:
+    """Storage backend name (YAML and env alike): one of _STORAGE_BACKENDS."""
+    if not isinstance(val, str) or val.strip().lower() not in _STORAGE_BACKENDS:
+        raise ValueError(f"expected one of {_STORAGE_BACKENDS}")
+    return val.strip().lower()
+
+
+def _int_at_least(minimum: int) -> Callable[[Any], int]:
+    """Coercer for integer settings clamped to a minimum (YAML and env alike)."""
+    return lambda val: max(minimum, int(val))
+
+
+# (field name, env var, YAML coercer, env coercer). Coercers raise TypeError or
+# ValueError for invalid input, in which case the previous value is kept.
+_FIELDS: list[tuple[str, str, Callable[[Any], Any], Callable[[str], Any]]] = [
+    ("redact", "MAIDA_REDACT", _yaml_bool, _env_bool),
+    ("redact_keys", "MAIDA_REDACT_KEYS", _yaml_str_list, _env_csv),
+    (
+        "max_field_bytes",
+        "MAIDA_MAX_FIELD_BYTES",
+        _int_at_least(_MIN_MAX_FIELD_BYTES),
+        _int_at_least(_MIN_MAX_FIELD_BYTES),
+    ),
+    (
+        "loop_window",
+        "MAIDA_LOOP_WINDOW",
+        _int_at_least(_MIN_LOOP_WINDOW),
+        _int_at_least(_MIN_LOOP_WINDOW),
+    ),
+    (
+        "loop_repetitions",
+        "MAIDA_LOOP_REPETITIONS",
+        _int_at_least(_MIN_LOOP_REPETITIONS),
+        _int_at_least(_MIN_LOOP_REPETITIONS),
+    ),
+    ("data_dir", "MAIDA_DATA_DIR", _yaml_path, _env_path),
+    ("storage", "MAIDA_STORAGE", _storage_backend, _storage_backend),
+]
+
+# (GuardrailParams field, env var, env coercer).
+_GUARDRAIL_ENV_FIELDS: list[tuple[str, str, Callable[[str], Any]]] = [
+    ("stop_on_loop", "MAIDA_STOP_ON_LOOP", _env_bool),
+    (
+        "stop_on_loop_min_repetitions",
+        "MAIDA_STOP_ON_LOOP_MIN_REPETITIONS",
+        _int_at_least(2),
+    ),
+    ("max_llm_calls", "MAIDA_MAX_LLM_CALLS", _int_at_least(0)),
+    ("max_tool_calls", "MAIDA_MAX_TOOL_CALLS", _int_at_least(0)),
+    ("max_events", "MAIDA_MAX_EVENTS", _int_at_least(0)),
+    ("max_duration_s", "MAIDA_MAX_DURATION_S", lambda val: max(0.0, float(val))),
+]
 
 
 def _guardrails_from_dict(data: dict[str, Any] | None) -> GuardrailParams:
@@ -144,82 +233,15 @@ def _guardrails_from_dict(data: dict[str, Any] | None) -> GuardrailParams:
 
 def _apply_env_to_guardrails(params: GuardrailParams) -> GuardrailParams:
     """Override guardrail params from environment variables."""
-    if "MAIDA_STOP_ON_LOOP" in os.environ:
-        params = GuardrailParams(
-            stop_on_loop=os.environ["MAIDA_STOP_ON_LOOP"].strip().lower()
-            in ("1", "true", "yes"),
-            stop_on_loop_min_repetitions=params.stop_on_loop_min_repetitions,
-            max_llm_calls=params.max_llm_calls,
-            max_tool_calls=params.max_tool_calls,
-            max_events=params.max_events,
-            max_duration_s=params.max_duration_s,
-        )
-    if "MAIDA_STOP_ON_LOOP_MIN_REPETITIONS" in os.environ:
-        try:
-            n = max(2, int(os.environ["MAIDA_STOP_ON_LOOP_MIN_REPETITIONS"]))
-            params = GuardrailParams(
-                stop_on_loop=params.stop_on_loop,
-                stop_on_loop_min_repetitions=n,
-                max_llm_calls=params.max_llm_calls,
-                max_tool_calls=params.max_tool_calls,
-                max_events=params.max_events,
-                max_duration_s=params.max_duration_s,
-            )
-        except ValueError:
-            pass
-    if "MAIDA_MAX_LLM_CALLS" in os.environ:
-        try:
-            n = max(0, int(os.environ["MAIDA_MAX_LLM_CALLS"]))
-            params = GuardrailParams(
-                stop_on_loop=params.stop_on_loop,
-                stop_on_loop_min_repetitions=params.stop_on_loop_min_repetitions,
-                max_llm_calls=n,
-                max_tool_calls=params.max_tool_calls,
-                max_events=params.max_events,
-                max_duration_s=params.max_duration_s,
-            )
-        except ValueError:
-            pass
-    if "MAIDA_MAX_TOOL_CALLS" in os.environ:
-        try:
-            n = max(0, int(os.environ["MAIDA_MAX_TOOL_CALLS"]))
-            params = GuardrailParams(
-                stop_on_loop=params.stop_on_loop,
-                stop_on_loop_min_repetitions=params.stop_on_loop_min_repetitions,
-                max_llm_calls=params.max_llm_calls,
-                max_tool_calls=n,
-                max_events=params.max_events,
-                max_duration_s=params.max_duration_s,
-            )
-        except ValueError:
-            pass
-    if "MAIDA_MAX_EVENTS" in os.environ:
-        try:
-            n = max(0, int(os.environ["MAIDA_MAX_EVENTS"]))
-            params = GuardrailParams(
-                stop_on_loop=params.stop_on_loop,
-                stop_on_loop_min_repetitions=params.stop_on_loop_min_repetitions,
-                max_llm_calls=params.max_llm_calls,
-                max_tool_calls=params.max_tool_calls,
-                max_events=n,
-                max_duration_s=params.max_duration_s,
-            )
-        except ValueError:
-            pass
-    if "MAIDA_MAX_DURATION_S" in os.environ:
-        try:
-            n = max(0.0, float(os.environ["MAIDA_MAX_DURATION_S"]))
-            params = GuardrailParams(
-                stop_on_loop=params.stop_on_loop,
-                stop_on_loop_min_repetitions=params.stop_on_loop_min_repetitions,
-                max_llm_calls=params.max_llm_calls,
-                max_tool_calls=params.max_tool_calls,
-                max_events=params.max_events,
-                max_duration_s=n,
-            )
-        except ValueError:
-            pass
-    return params
+    env = os.environ
+    overrides: dict[str, Any] = {}
+    for name, env_var, from_env in _GUARDRAIL_ENV_FIELDS:
+        if (raw := env.get(env_var)) is not None:
+            try:
+                overrides[name] = from_env(raw)
+            except ValueError:
+                pass
+    return replace(params, **overrides) if overrides else params
 
 
 def load_config(project_root: Path | None = None) -> MaidaConfig:
@@ -230,89 +252,82 @@ def load_config(project_root: Path | None = None) -> MaidaConfig:
     3. ~/.maida/config.yaml
     """
     base = Path.home() / LOCAL_DIR_NAME
-    redact = _DEFAULT_REDACT
-    redact_keys = _DEFAULT_REDACT_KEYS.copy()
-    max_field_bytes = _DEFAULT_MAX_FIELD_BYTES
-    loop_window = _DEFAULT_LOOP_WINDOW
-    loop_repetitions = _DEFAULT_LOOP_REPETITIONS
-    data_dir = base
-
-    # 3. User config
-    user_config_path = base / "config.yaml"
-    user_cfg = _load_yaml(user_config_path)
-    if user_cfg:
-        redact = _apply_yaml(user_cfg, "redact", redact)
-        redact_keys = _apply_yaml(user_cfg, "redact_keys", redact_keys)
-        max_field_bytes = _apply_yaml(user_cfg, "max_field_bytes", max_field_bytes)
-        loop_window = _apply_yaml(user_cfg, "loop_window", loop_window)
-        loop_repetitions = _apply_yaml(user_cfg, "loop_repetitions", loop_repetitions)
-        data_dir = _apply_yaml(user_cfg, "data_dir", data_dir)
-
+    values: dict[str, Any] = {
+        "redact": _DEFAULT_REDACT,
+        "redact_keys": _DEFAULT_REDACT_KEYS.copy(),
+        "max_field_bytes": _DEFAULT_MAX_FIELD_BYTES,
+        "loop_window": _DEFAULT_LOOP_WINDOW,
+        "loop_repetitions": _DEFAULT_LOOP_REPETITIONS,
+        "data_dir": base,
+        "storage": _DEFAULT_STORAGE,
+    }
     guardrails = GuardrailParams()
-    if user_cfg and "guardrails" in user_cfg:
-        guardrails = _guardrails_from_dict(user_cfg.get("guardrails"))
 
-    # 2. Project config (overrides user)
     # TODO: `cwd()` might not be the best default for CLI root:
     #       If the tool is called from another location, CWD
     #       will not set the root to the project, but the place
     #       where CLI was called from.
     root = project_root if project_root is not None else Path.cwd()
-    project_config_path = root / LOCAL_DIR_NAME / "config.yaml"
-    proj_cfg = _load_yaml(project_config_path)
-    if proj_cfg:
-        redact = _apply_yaml(proj_cfg, "redact", redact)
-        redact_keys = _apply_yaml(proj_cfg, "redact_keys", redact_keys)
-        max_field_bytes = _apply_yaml(proj_cfg, "max_field_bytes", max_field_bytes)
-        loop_window = _apply_yaml(proj_cfg, "loop_window", loop_window)
-        loop_repetitions = _apply_yaml(proj_cfg, "loop_repetitions", loop_repetitions)
-        data_dir = _apply_yaml(proj_cfg, "data_dir", data_dir)
-        if "guardrails" in proj_cfg:
-            guardrails = _guardrails_from_dict(proj_cfg.get("guardrails"))
+
+    # 3. User config, then 2. project config (overrides user)
+    for path in (base / "config.yaml", root / LOCAL_DIR_NAME / "config.yaml"):
+        cfg = _load_yaml(path)
+        for name, _env_var, from_yaml, _from_env in _FIELDS:
+            if name in cfg:
+                try:
+                    values[name] = from_yaml(cfg[name])
+                except (TypeError, ValueError):
+                    pass
+        if "guardrails" in cfg:
+            guardrails = _guardrails_from_dict(cfg.get("guardrails"))
 
     # 1. Env overrides (only when the key is explicitly set in the environment)
-    if "MAIDA_REDACT" in os.environ:
-        redact = os.environ["MAIDA_REDACT"].strip().lower() in ("1", "true", "yes")
-
-    if "MAIDA_REDACT_KEYS" in os.environ:
-        env_keys = os.environ["MAIDA_REDACT_KEYS"]
-        redact_keys = [k.strip() for k in env_keys.split(",") if k.strip()]
-
-    if "MAIDA_MAX_FIELD_BYTES" in os.environ:
-        try:
-            max_field_bytes = max(
-                _MIN_MAX_FIELD_BYTES, int(os.environ["MAIDA_MAX_FIELD_BYTES"])
-            )
-        except ValueError:
-            pass
-
-    if "MAIDA_LOOP_WINDOW" in os.environ:
-        try:
-            loop_window = max(_MIN_LOOP_WINDOW, int(os.environ["MAIDA_LOOP_WINDOW"]))
-        except ValueError:
-            pass
-
-    if "MAIDA_LOOP_REPETITIONS" in os.environ:
-        try:
-            loop_repetitions = max(
-                _MIN_LOOP_REPETITIONS, int(os.environ["MAIDA_LOOP_REPETITIONS"])
-            )
-        except ValueError:
-            pass
-
-    if "MAIDA_DATA_DIR" in os.environ:
-        env_data = os.environ["MAIDA_DATA_DIR"].strip()
-        if env_data:
-            data_dir = Path(env_data).expanduser()
+    env = os.environ
+    for name, env_var, _from_yaml, from_env in _FIELDS:
+        if (raw := env.get(env_var)) is not None:
+            try:
+                values[name] = from_env(raw)
+            except ValueError:
+                pass
 
     guardrails = _apply_env_to_guardrails(guardrails)
 
-    return MaidaConfig(
-        redact=redact,
-        redact_keys=redact_keys,
-        max_field_bytes=max_field_bytes,
-        loop_window=loop_window,
-        loop_repetitions=loop_repetitions,
-        data_dir=data_dir,
-        guardrails=guardrails,
+    return MaidaConfig(**values, guardrails=guardrails)
+
+
+def _file_key(path: Path) -> tuple[str, int, int]:
+    """Cache key for a config file: (path, mtime_ns, size); zeros when the file is missing."""
+    try:
+        st = path.stat()
+    except OSError:
+        return (str(path), 0, 0)
+    return (str(path), st.st_mtime_ns, st.st_size)
+
+
+@functools.lru_cache(maxsize=1)
+def _cached_config(
+    root: Path,
+    user_key: tuple[str, int, int],
+    project_key: tuple[str, int, int],
+    env_key: tuple[tuple[str, str], ...],
+) -> MaidaConfig:
+    """Load config once per (config file mtimes, MAIDA_* env) combination."""
+    return load_config(project_root=root)
+
+
+def get_config(project_root: Path | None = None) -> MaidaConfig:
+    """
+    Return MaidaConfig, reusing the last result while inputs are unchanged.
+
+    The cache key covers the mtimes of ~/.maida/config.yaml and the project
+    .maida/config.yaml plus all MAIDA_* environment variables, so edits to
+    either are picked up on the next call. Callers must not mutate the result;
+    use load_config() when a fresh object is needed.
+    """
+    root = project_root if project_root is not None else Path.cwd()
+    user_key = _file_key(Path.home() / LOCAL_DIR_NAME / "config.yaml")
+    project_key = _file_key(root / LOCAL_DIR_NAME / "config.yaml")
+    env_key = tuple(
+        sorted((k, v) for k, v in os.environ.items() if k.startswith("MAIDA_"))
     )
+    return _cached_config(root, user_key, project_key, env_key)
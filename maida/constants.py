@@ -1,6 +1,7 @@
 """Shared constants: spec version, count schema, and redaction/truncation markers."""
 
 from pathlib import Path
+from types import MappingProxyType
 
 REDACTED_MARKER = "__REDACTED__"
 TRUNCATED_MARKER = "__TRUNCATED__"
@@ -17,11 +18,17 @@ DEPTH_LIMIT = 10
 LOCAL_DIR_NAME = Path(".maida")
 
 
-def default_counts() -> dict[str, int]:
-    """Default counts per SPEC run.json schema. Keys: llm_calls, tool_calls, errors, loop_warnings."""
-    return {
+# Read-only template; default_counts() hands out copies.
+_DEFAULT_COUNTS_TEMPLATE = MappingProxyType(
+    {
         "llm_calls": 0,
         "tool_calls": 0,
         "errors": 0,
         "loop_warnings": 0,
     }
+)
+
+
+def default_counts() -> dict[str, int]:
+    """Default counts per SPEC run.json schema. Keys: llm_calls, tool_calls, errors, loop_warnings."""
+    return _DEFAULT_COUNTS_TEMPLATE.copy()
@@ -8,8 +8,12 @@ Hook ordering caveat: CrewAI runs hooks in registration order. If another before
 and blocks execution, our before-hook may never run for that call, so we cannot capture it.
 """
 
+import importlib.util
+import logging
 import time
 import traceback
+from collections import deque
+from dataclasses import dataclass, field
 from types import TracebackType
 from typing import Any
 
@@ -18,48 +22,85 @@ from maida._tracing._context import _ensure_run
 from maida.integrations._error import MissingOptionalDependencyError
 from maida.tracing import record_llm_call, record_tool_call
 
-try:
-    from crewai.hooks import (
-        register_after_llm_call_hook,
-        register_after_tool_call_hook,
-        register_before_llm_call_hook,
-        register_before_tool_call_hook,
-    )
-except ImportError as e:
-    raise MissingOptionalDependencyError(
-        "CrewAI integration requires optional deps. Install with `pip install maida-ai[crewai]`."
-    ) from e
+logger = logging.getLogger(__name__)
 
+_MISSING_CREWAI_MSG = "CrewAI integration requires optional deps. Install with `pip install maida-ai[crewai]`."
+
+
+def _crewai_available() -> bool:
+    """True if crewai is importable. Uses find_spec so crewai itself is not imported."""
+    try:
+        return importlib.util.find_spec("crewai") is not None
+    except ValueError:
+        # Already in sys.modules without a __spec__ (e.g. a stub module).
+        return True
+
+
+# crewai (and its litellm/pydantic stack) is only imported when hooks are registered
+# on the first run_enter; fail fast here if it is not installed at all.
+if not _crewai_available():
+    raise MissingOptionalDependencyError(_MISSING_CREWAI_MSG)
+
+
+@dataclass(slots=True)
+class _PendingCall:
+    """An LLM/tool call seen by a before-hook and awaiting its after-hook."""
+
+    start_ns: int  # time.perf_counter_ns() at the before-hook
+    payload: Any  # snapshot of messages (LLM) or tool_input (tool)
+    meta: dict[str, Any]
+    model: str | None = None
+    # Direct reference to meta["crewai"], so after-hooks update it without a lookup.
+    crewai_meta: dict[str, Any] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.crewai_meta = self.meta.setdefault("crewai", {})
+
+
+# Sentinel for attributes absent from a hook context (a present None is still recorded).
+_MISSING = object()
 
 # Register CrewAI hooks once per process (idempotent). Set on first run_enter.
 _crewai_hooks_registered = False
+# Set when crewai.hooks failed to import, so later runs skip the retry and the warning.
+_crewai_hooks_unavailable = False
 
-# Per-run pending: run_id -> { key: entry }. Keys are stable for before/after matching.
-# LLM: we use a stack per (run_id, executor_id, iterations) so after_hook pops the matching before.
+# Per-run state, all keyed by run_id at the outer level so run exit is a single pop().
+# LLM: we use a stack per (executor_id, iterations) so after_hook pops the matching before.
 _pending_llm: dict[
-    str, dict[tuple[int, int, int], dict[str, Any]]
+    str, dict[tuple[int, int, int], _PendingCall]
 ] = {}  # run_id -> {(exec_id, it, seq): entry}
 _llm_stack: dict[
-    tuple[str, int, int], list[tuple[int, int, int]]
-] = {}  # (run_id, exec_id, it) -> [keys]
+    str, dict[tuple[int, int], list[tuple[int, int, int]]]
+] = {}  # run_id -> {(exec_id, it): [keys]}
 _llm_next_seq: dict[
-    tuple[str, int, int], int
-] = {}  # (run_id, exec_id, it) -> next sequence number
+    str, dict[tuple[int, int], int]
+] = {}  # run_id -> {(exec_id, it): next sequence number}
 
+# Tool: FIFO per tool_name; after_hook matches the oldest pending before_hook.
 _pending_tool: dict[
-    str, dict[tuple[str, int], dict[str, Any]]
-] = {}  # run_id -> {(tool_name, seq): entry}
-_tool_next_seq: dict[
-    tuple[str, str], int
-] = {}  # (run_id, tool_name) -> next sequence number
+    str, dict[str, deque[_PendingCall]]
+] = {}  # run_id -> {tool_name: deque of entries in arrival order}
+
+
+def _elapsed_ms(start_ns: int) -> int:
+    """Whole milliseconds since a time.perf_counter_ns() reading (integer math, never negative)."""
+    return max(0, (time.perf_counter_ns() - start_ns) // 1_000_000)
 
 
 def _snapshot_messages(messages: Any) -> Any:
-    """Snapshot messages for storage (avoid holding mutable refs)."""
+    """
+    Snapshot messages for storage (avoid holding mutable refs).
+
+    CrewAI mutates context.messages in place between before/after hooks, so the
+    copy has to happen here; a tuple of strings is already immutable and is kept.
+    """
     if messages is None:
         return None
     if not isinstance(messages, (list, tuple)):
         return messages
+    if isinstance(messages, tuple) and all(isinstance(m, str) for m in messages):
+        return messages
     out = []
     for m in messages:
         if isinstance(m, dict):
@@ -96,29 +137,35 @@ def _model_from_llm(llm: Any) -> str:
     return str(llm)[:200] if llm else "unknown"
 
 
+def _crewai_meta_common(context: Any, meta: dict[str, Any]) -> None:
+    """Add agent_role / task_desc from context to meta (in place)."""
+    agent = getattr(context, "agent", None)
+    role = getattr(agent, "role", None) if agent is not None else None
+    if role:
+        meta["agent_role"] = role
+    task = getattr(context, "task", None)
+    description = getattr(task, "description", None) if task is not None else None
+    if description:
+        meta["task_desc"] = description
+
+
 def _crewai_meta_llm(context: Any) -> dict[str, Any]:
     """Build meta.crewai.* for LLM_CALL."""
     meta: dict[str, Any] = {"framework": "crewai"}
     try:
-        if hasattr(context, "executor") and context.executor is not None:
-            meta["crewai"] = meta.get("crewai") or {}
-            meta["crewai"]["executor_id"] = id(context.executor)
-        if hasattr(context, "iterations"):
-            meta.setdefault("crewai", {})["iterations"] = context.iterations
-        if (
-            hasattr(context, "agent")
-            and context.agent is not None
-            and getattr(context.agent, "role", None)
-        ):
-            meta["agent_role"] = context.agent.role
-        if (
-            hasattr(context, "task")
-            and context.task is not None
-            and getattr(context.task, "description", None)
-        ):
-            meta["task_desc"] = context.task.description
-        if hasattr(context, "crew") and context.crew is not None:
-            meta.setdefault("crewai", {})["crew_id"] = id(context.crew)
+        crewai_sub: dict[str, Any] = {}
+        executor = getattr(context, "executor", None)
+        if executor is not None:
+            crewai_sub["executor_id"] = id(executor)
+        iterations = getattr(context, "iterations", _MISSING)
+        if iterations is not _MISSING:
+            crewai_sub["iterations"] = iterations
+        _crewai_meta_common(context, meta)
+        crew = getattr(context, "crew", None)
+        if crew is not None:
+            crewai_sub["crew_id"] = id(crew)
+        if crewai_sub:
+            meta["crewai"] = crewai_sub
     except Exception:
         pass
     return meta
@@ -128,18 +175,7 @@ def _crewai_meta_tool(context: Any) -> dict[str, Any]:
     """Build meta.crewai.* for TOOL_CALL."""
     meta: dict[str, Any] = {"framework": "crewai"}
     try:
-        if (
-            hasattr(context, "agent")
-            and context.agent is not None
-            and getattr(context.agent, "role", None)
-        ):
-            meta["agent_role"] = context.agent.role
-        if (
-            hasattr(context, "task")
-            and context.task is not None
-            and getattr(context.task, "description", None)
-        ):
-            meta["task_desc"] = context.task.description
+        _crewai_meta_common(context, meta)
     except Exception:
         pass
     return meta
@@ -150,6 +186,15 @@ def _ensure_crewai_hooks_registered() -> None:
     global _crewai_hooks_registered
     if _crewai_hooks_registered:
         return
+    try:
+        from crewai.hooks import (
+            register_after_llm_call_hook,
+            register_after_tool_call_hook,
+            register_before_llm_call_hook,
+            register_before_tool_call_hook,
+        )
+    except ImportError as e:
+        raise MissingOptionalDependencyError(_MISSING_CREWAI_MSG) from e
     register_before_llm_call_hook(_before_llm_call)
     register_after_llm_call_hook(_after_llm_call)
     register_before_tool_call_hook(_before_tool_call)
@@ -175,17 +220,18 @@ def _before_llm_call(context: Any) -> bool | None:
             else 0
         )
         iterations = getattr(context, "iterations", 0)
-        key_base = (run_id, executor_id, iterations)
-        seq = _llm_next_seq.get(key_base, 0)
-        _llm_next_seq[key_base] = seq + 1
+        key_base = (executor_id, iterations)
+        next_seq = _llm_next_seq.setdefault(run_id, {})
+        seq = next_seq.get(key_base, 0)
+        next_seq[key_base] = seq + 1
         key = (executor_id, iterations, seq)
-        _pending_llm.setdefault(run_id, {})[key] = {
-            "start_ts": time.perf_counter(),
-            "messages": _snapshot_messages(getattr(context, "messages", None)),
-            "model": _model_from_llm(getattr(context, "llm", None)),
-            "meta": _crewai_meta_llm(context),
-        }
-        _llm_stack.setdefault(key_base, []).append(key)
+        _pending_llm.setdefault(run_id, {})[key] = _PendingCall(
+            start_ns=time.perf_counter_ns(),
+            payload=_snapshot_messages(getattr(context, "messages", None)),
+            meta=_crewai_meta_llm(context),
+            model=_model_from_llm(getattr(context, "llm", None)),
+        )
+        _llm_stack.setdefault(run_id, {}).setdefault(key_base, []).append(key)
         return None
     except Exception:
         return None
@@ -203,28 +249,22 @@ def _after_llm_call(context: Any) -> str | None:
             else 0
         )
         iterations = getattr(context, "iterations", 0)
-        key_base = (run_id, executor_id, iterations)
-        stack = _llm_stack.get(key_base, [])
+        stack = _llm_stack.get(run_id, {}).get((executor_id, iterations))
         if not stack:
             return None
         key = stack.pop()
         pending = _pending_llm.get(run_id, {}).pop(key, None)
         if pending is None:
             return None
-        duration_ms = max(0, int((time.perf_counter() - pending["start_ts"]) * 1000))
+        # The entry was popped above, so its meta dict can be finished in place.
+        pending.crewai_meta["duration_ms"] = _elapsed_ms(pending.start_ns)
         response = getattr(context, "response", None)
         record_llm_call(
-            model=pending["model"],
-            prompt=pending["messages"],
+            model=pending.model,
+            prompt=pending.payload,
             response=response,
             usage=None,
-            meta={
-                **pending["meta"],
-                "crewai": {
-                    **(pending["meta"].get("crewai") or {}),
-                    "duration_ms": duration_ms,
-                },
-            },
+            meta=pending.meta,
             provider="unknown",
             status="ok",
         )
@@ -240,15 +280,13 @@ def _before_tool_call(context: Any) -> bool | None:
         if run_id is None:
             return None
         tool_name = getattr(context, "tool_name", "unknown") or "unknown"
-        key_base = (run_id, tool_name)
-        seq = _tool_next_seq.get(key_base, 0)
-        _tool_next_seq[key_base] = seq + 1
-        key = (tool_name, seq)
-        _pending_tool.setdefault(run_id, {})[key] = {
-            "start_ts": time.perf_counter(),
-            "tool_input": _snapshot_tool_input(getattr(context, "tool_input", None)),
-            "meta": _crewai_meta_tool(context),
-        }
+        _pending_tool.setdefault(run_id, {}).setdefault(tool_name, deque()).append(
+            _PendingCall(
+                start_ns=time.perf_counter_ns(),
+                payload=_snapshot_tool_input(getattr(context, "tool_input", None)),
+                meta=_crewai_meta_tool(context),
+            )
+        )
         return None
     except Exception:
         return None
@@ -262,25 +300,19 @@ def _after_tool_call(context: Any) -> str | None:
             return None
         tool_name = getattr(context, "tool_name", "unknown") or "unknown"
         by_run = _pending_tool.get(run_id, {})
-        # Match FIFO: same tool_name, smallest seq (first before_hook for this tool).
-        candidates = [k for k in by_run if k[0] == tool_name]
-        if not candidates:
+        queue = by_run.get(tool_name)
+        if not queue:
             return None
-        matching_key = min(candidates, key=lambda k: k[1])
-        pending = by_run.pop(matching_key)
-        duration_ms = max(0, int((time.perf_counter() - pending["start_ts"]) * 1000))
+        pending = queue.popleft()
+        if not queue:
+            del by_run[tool_name]
+        pending.crewai_meta["duration_ms"] = _elapsed_ms(pending.start_ns)
         tool_result = getattr(context, "tool_result", None)
         record_tool_call(
             name=tool_name,
-            args=pending["tool_input"],
+            args=pending.payload,
             result=tool_result,
-            meta={
-                **pending["meta"],
-                "crewai": {
-                    **(pending["meta"].get("crewai") or {}),
-                    "duration_ms": duration_ms,
-                },
-            },
+            meta=pending.meta,
             status="ok",
         )
         return None
@@ -288,14 +320,31 @@ def _after_tool_call(context: Any) -> str | None:
         return None
 
 
+def _clear_run_state(run_id: str) -> None:
+    """Drop all per-run bookkeeping for run_id."""
+    _pending_llm.pop(run_id, None)
+    _pending_tool.pop(run_id, None)
+    _llm_stack.pop(run_id, None)
+    _llm_next_seq.pop(run_id, None)
+
+
 def _flush_pending_for_run(
     run_id: str,
     exc_type: type[BaseException] | None,
     exc_value: BaseException | None,
     tb: TracebackType | None,
 ) -> None:
-    """Emit best-effort events for pending LLM/tool calls and clear per-run state."""
+    """
+    Emit best-effort events for pending LLM/tool calls and clear per-run state.
+
+    Entries are discarded afterwards, so their meta dicts are completed in place.
+    """
     try:
+        if not _pending_llm.get(run_id) and not _pending_tool.get(run_id):
+            # Clean exit (the common case): nothing to record, so skip formatting the traceback.
+            _clear_run_state(run_id)
+            return
+
         if exc_type is not None and exc_value is not None and tb is not None:
             stack = "".join(traceback.format_exception(exc_type, exc_value, tb))
             incomplete_error: dict[str, Any] = {
@@ -310,61 +359,53 @@ def _flush_pending_for_run(
                 "stack": None,
             }
 
-        for key, entry in list(_pending_llm.get(run_id, {}).items()):
-            duration_ms = max(0, int((time.perf_counter() - entry["start_ts"]) * 1000))
-            crewai_meta = {
-                **((entry.get("meta") or {}).get("crewai") or {}),
-                "completion": "missing_after_hook",
-                "duration_ms": duration_ms,
-            }
-            meta = {**(entry.get("meta") or {}), "crewai": crewai_meta}
+        for entry in _pending_llm.get(run_id, {}).values():
+            entry.crewai_meta["completion"] = "missing_after_hook"
+            entry.crewai_meta["duration_ms"] = _elapsed_ms(entry.start_ns)
             record_llm_call(
-                model=entry["model"],
-                prompt=entry["messages"],
+                model=entry.model,
+                prompt=entry.payload,
                 response=None,
                 usage=None,
-                meta=meta,
+                meta=entry.meta,
                 provider="unknown",
                 status="error",
                 error=incomplete_error,
             )
 
-        for key, entry in list(_pending_tool.get(run_id, {}).items()):
-            duration_ms = max(0, int((time.perf_counter() - entry["start_ts"]) * 1000))
-            crewai_meta = {
-                **((entry.get("meta") or {}).get("crewai") or {}),
-                "completion": "missing_after_hook",
-                "duration_ms": duration_ms,
-            }
-            meta = {**(entry.get("meta") or {}), "crewai": crewai_meta}
-            record_tool_call(
-                name=key[0],
-                args=entry["tool_input"],
-                result=None,
-                meta=meta,
-                status="error",
-                error=incomplete_error,
-            )
-
-        _pending_llm.pop(run_id, None)
-        _pending_tool.pop(run_id, None)
-        for k in list(_llm_stack.keys()):
-            if k[0] == run_id:
-                del _llm_stack[k]
-        for k in list(_llm_next_seq.keys()):
-            if k[0] == run_id:
-                del _llm_next_seq[k]
-        for k in list(_tool_next_seq.keys()):
-            if k[0] == run_id:
-                del _tool_next_seq[k]
+        for tool_name, queue in _pending_tool.get(run_id, {}).items():
+            for entry in queue:
+                entry.crewai_meta["completion"] = "missing_after_hook"
+                entry.crewai_meta["duration_ms"] = _elapsed_ms(entry.start_ns)
+                record_tool_call(
+                    name=tool_name,
+                    args=entry.payload,
+                    result=None,
+                    meta=entry.meta,
+                    status="error",
+                    error=incomplete_error,
+                )
+
+        _clear_run_state(run_id)
     except Exception:
         pass
 
 
 def _on_run_enter() -> None:
-    """Lifecycle: on run start, ensure CrewAI hooks are registered once."""
+    """Lifecycle: on run start, import crewai.hooks and register our hooks once."""
+    global _crewai_hooks_unavailable
+    if _crewai_hooks_unavailable:
+        return
     try:
         _ensure_crewai_hooks_registered()
+    except MissingOptionalDependencyError:
+        # crewai passed the import-time check, but this version has no crewai.hooks;
+        # say so (once) rather than silently recording nothing.
+        _crewai_hooks_unavailable = True
+        logger.warning(
+            "maida CrewAI integration: crewai is installed but crewai.hooks could not "
+            "be imported; CrewAI LLM/tool calls will not be recorded. Upgrade crewai."
+        )
     except Exception:
         pass
 
@@ -4,18 +4,25 @@ Minimal FastAPI server for the local viewer.
 Serves GET /api/runs, GET /api/runs/{run_id}, GET /api/runs/{run_id}/events,
 and GET / with static index.html. No CORS by default.
 Config is loaded once at app creation and cached on app.state.
+FastAPI/pydantic are imported inside create_app() so importing this module stays cheap.
 """
 
+import hashlib
 from pathlib import Path
-
-from fastapi import Depends, FastAPI, HTTPException, Request, Response
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
+from typing import TYPE_CHECKING, Annotated
 
 import maida.storage as storage
-from maida.config import MaidaConfig, load_config
+from maida.config import MaidaConfig, get_config
 from maida.constants import SPEC_VERSION
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    from fastapi import FastAPI, Request, Response
+
 UI_STATIC_DIR = Path(__file__).resolve().parent / "ui_static"
 UI_INDEX_PATH = UI_STATIC_DIR / "index.html"
 UI_STYLES_PATH = UI_STATIC_DIR / "styles.css"
@@ -23,15 +30,94 @@ UI_APP_JS_PATH = UI_STATIC_DIR / "app.js"
 FAVICON_PATH = UI_STATIC_DIR / "favicon.svg"
 
 
-def _get_config(request: Request) -> MaidaConfig:
-    """Return config cached on app state (set at app creation)."""
-    return request.app.state.config
+def _static_etag(path: Path) -> str | None:
+    """Content-hash ETag for a static UI file; None if the file is missing."""
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+    return '"' + hashlib.md5(data, usedforsecurity=False).hexdigest()[:16] + '"'
+
+
+def _serve_static(
+    request: "Request",
+    path: Path,
+    etag: str | None,
+    media_type: str,
+    missing_detail: str,
+) -> "Response":
+    """
+    Serve a static UI file with its precomputed ETag.
+
+    Cache-Control stays no-cache so the browser always revalidates (a package
+    upgrade shows up immediately); a matching If-None-Match gets an empty 304.
+    """
+    from fastapi import HTTPException, Response
+    from fastapi.responses import FileResponse
+
+    if etag is None:
+        raise HTTPException(status_code=404, detail=missing_detail)
+    headers = {"Cache-Control": "no-cache", "ETag": etag}
+    if_none_match = request.headers.get("if-none-match", "")
+    if any(tag.strip() in (etag, "*") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+def _json_response(payload: dict) -> "dict | Response":
+    """
+    Serialize large payloads with orjson when installed (optional `maida-ai[orjson]`).
 
+    Without orjson, or for values orjson rejects (e.g. integers wider than 64 bits),
+    return the dict and let FastAPI serialize it as usual.
+    """
+    if orjson is None:
+        return payload
+    from fastapi import Response
 
-def create_app() -> FastAPI:
+    try:
+        content = orjson.dumps(payload)
+    except TypeError:
+        return payload
+    return Response(content=content, media_type="application/json")
+
+
+def create_app() -> "FastAPI":
     """Create and return the FastAPI application for the local viewer."""
+    from fastapi import Depends, FastAPI, HTTPException, Request, Response
+    from fastapi import Path as PathParam
+    from fastapi.exception_handlers import request_validation_exception_handler
+    from fastapi.exceptions import RequestValidationError
+    from fastapi.responses import FileResponse, JSONResponse
+    from pydantic import BaseModel
+
+    # Malformed run_ids are rejected by the route's length check and compiled
+    # pattern, before the handler runs; storage still validates as defense-in-depth.
+    RunId = Annotated[
+        str,
+        PathParam(min_length=36, max_length=36, pattern=storage.RUN_ID_PATTERN),
+    ]
+
+    def _get_config(request: Request) -> MaidaConfig:
+        """Return config cached on app state (set at app creation)."""
+        return request.app.state.config
+
     app = FastAPI(title="Maida Viewer")
-    app.state.config = load_config()
+
+    @app.exception_handler(RequestValidationError)
+    async def _validation_error(
+        request: Request, exc: RequestValidationError
+    ) -> Response:
+        """Report a run_id that fails the route pattern as 400 invalid run_id (not 422)."""
+        if any(tuple(err["loc"][:2]) == ("path", "run_id") for err in exc.errors()):
+            return JSONResponse(status_code=400, content={"detail": "invalid run_id"})
+        return await request_validation_exception_handler(request, exc)
+
+    app.state.config = get_config()
+    # UI files only change on reinstall: hash them once per app, not per request.
+    index_etag = _static_etag(UI_INDEX_PATH)
+    styles_etag = _static_etag(UI_STYLES_PATH)
+    app_js_etag = _static_etag(UI_APP_JS_PATH)
 
     class RenameRunRequest(BaseModel):
         run_name: str
@@ -43,7 +129,7 @@ def create_app() -> FastAPI:
         return {"spec_version": SPEC_VERSION, "runs": runs}
 
     @app.get("/api/runs/{run_id}")
-    def get_run_meta(run_id: str, config: MaidaConfig = Depends(_get_config)) -> dict:
+    def get_run_meta(run_id: RunId, config: MaidaConfig = Depends(_get_config)) -> dict:
         """Return run.json metadata for the given run_id."""
         try:
             return storage.load_run_meta(run_id, config)
@@ -52,8 +138,10 @@ def create_app() -> FastAPI:
         except FileNotFoundError:
             raise HTTPException(status_code=404, detail="run not found")
 
-    @app.get("/api/runs/{run_id}/events")
-    def get_run_events(run_id: str, config: MaidaConfig = Depends(_get_config)) -> dict:
+    @app.get("/api/runs/{run_id}/events", response_model=dict)
+    def get_run_events(
+        run_id: RunId, config: MaidaConfig = Depends(_get_config)
+    ) -> dict | Response:
         """Return events array for the run. 404 if run not found."""
         try:
             storage.load_run_meta(run_id, config)
@@ -65,14 +153,18 @@ def create_app() -> FastAPI:
             events = storage.load_events(run_id, config)
         except ValueError:
             raise HTTPException(status_code=400, detail="invalid run_id")
-        return {
-            "spec_version": SPEC_VERSION,
-            "run_id": run_id,
-            "events": events,
-        }
+        return _json_response(
+            {
+                "spec_version": SPEC_VERSION,
+                "run_id": run_id,
+                "events": events,
+            }
+        )
 
     @app.get("/api/runs/{run_id}/paths")
-    def get_run_paths(run_id: str, config: MaidaConfig = Depends(_get_config)) -> dict:
+    def get_run_paths(
+        run_id: RunId, config: MaidaConfig = Depends(_get_config)
+    ) -> dict:
         """Return local filesystem paths for the run (run_dir, run_json, events_jsonl)."""
         try:
             paths = storage.get_run_paths(run_id, config)
@@ -84,7 +176,7 @@ def create_app() -> FastAPI:
 
     @app.get("/api/runs/{run_id}/rename")
     def validate_run_for_rename(
-        run_id: str, config: MaidaConfig = Depends(_get_config)
+        run_id: RunId, config: MaidaConfig = Depends(_get_config)
     ) -> dict:
         """
         Validate run_id and return metadata.
@@ -101,7 +193,7 @@ def create_app() -> FastAPI:
 
     @app.post("/api/runs/{run_id}/rename")
     def rename_run(
-        run_id: str,
+        run_id: RunId,
         payload: RenameRunRequest,
         config: MaidaConfig = Depends(_get_config),
     ) -> dict:
@@ -116,7 +208,9 @@ def create_app() -> FastAPI:
             raise HTTPException(status_code=404, detail="run not found")
 
     @app.delete("/api/runs/{run_id}")
-    def delete_run(run_id: str, config: MaidaConfig = Depends(_get_config)) -> Response:
+    def delete_run(
+        run_id: RunId, config: MaidaConfig = Depends(_get_config)
+    ) -> Response:
         """Delete a run directory and its contents."""
         try:
             storage.delete_run(run_id, config)
@@ -134,33 +228,32 @@ def create_app() -> FastAPI:
         return FileResponse(FAVICON_PATH, media_type="image/svg+xml")
 
     @app.get("/styles.css")
-    def serve_styles() -> Response:
+    def serve_styles(request: Request) -> Response:
         """Serve UI stylesheet."""
-        if not UI_STYLES_PATH.is_file():
-            raise HTTPException(status_code=404, detail="styles not found")
-        response = FileResponse(UI_STYLES_PATH, media_type="text/css")
-        response.headers["Cache-Control"] = "no-cache"
-        return response
+        return _serve_static(
+            request, UI_STYLES_PATH, styles_etag, "text/css", "styles not found"
+        )
 
     @app.get("/app.js")
-    def serve_app_js() -> Response:
+    def serve_app_js(request: Request) -> Response:
         """Serve UI application script."""
-        if not UI_APP_JS_PATH.is_file():
-            raise HTTPException(status_code=404, detail="app.js not found")
-        response = FileResponse(UI_APP_JS_PATH, media_type="application/javascript")
-        response.headers["Cache-Control"] = "no-cache"
-        return response
+        return _serve_static(
+            request,
+            UI_APP_JS_PATH,
+            app_js_etag,
+            "application/javascript",
+            "app.js not found",
+        )
 
     @app.get("/")
-    def serve_ui() -> Response:
+    def serve_ui(request: Request) -> Response:
         """Serve the static HTML UI with content-type text/html."""
-        if not UI_INDEX_PATH.is_file():
-            raise HTTPException(
-                status_code=404,
-                detail="UI not found: maida/ui_static/index.html is missing",
-            )
-        response = FileResponse(UI_INDEX_PATH, media_type="text/html")
-        response.headers["Cache-Control"] = "no-cache"
-        return response
+        return _serve_static(
+            request,
+            UI_INDEX_PATH,
+            index_etag,
+            "text/html",
+            "UI not found: maida/ui_static/index.html is missing",
+        )
 
     return app
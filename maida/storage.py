@@ -2,29 +2,97 @@
 Local storage for Maida runs: run metadata (run.json) and append-only events (events.jsonl).
 
 ~/.maida/runs/<run_id>/ with required run.json and events.jsonl.
-Uses config.data_dir (default ~/.maida). Stdlib only.
+Uses config.data_dir (default ~/.maida). Stdlib only, plus orjson for events.jsonl
+when the optional `maida-ai[orjson]` extra is installed.
+
+With config.storage == "memory" (MAIDA_STORAGE=memory) the same API keeps runs in
+process memory instead (_MemoryBackend, one per data_dir, capped at
+_MEMORY_MAX_RUNS runs); nothing is written to disk.
 """
 
+import copy
 import json
 import logging
+import mmap
 import os
+import re
 import shutil
 import tempfile
+import threading
 import uuid
+from collections.abc import Collection, Iterator
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import BinaryIO
 
 from maida.config import MaidaConfig
 from maida.constants import SPEC_VERSION, default_counts
 from maida.events import utc_now_iso_ms_z
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
 RUN_JSON = "run.json"
 EVENTS_JSONL = "events.jsonl"
 
 logger = logging.getLogger(__name__)
 
+
+def _encode_event_line(event: dict) -> bytes:
+    """
+    Serialize one event as a UTF-8 JSONL line (with trailing newline).
+
+    Uses orjson when installed (optional `maida-ai[orjson]`); falls back to the
+    stdlib for values orjson rejects (e.g. integers wider than 64 bits).
+    orjson writes NaN and +/-Infinity as null, where the stdlib writes the
+    non-standard NaN/Infinity tokens; both forms are read back by load_events.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(event, option=orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            pass
+    return (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+# A 20-digit run (or a 19-digit one after a minus sign) may be an integer outside
+# the 64-bit range, which orjson.loads would turn into a float; such lines go
+# through the stdlib instead.
+_WIDE_INT_RE = re.compile(rb"-[0-9]{19}|[0-9]{20}")
+
+
+def _decode_event_line(line: bytes) -> dict:
+    """
+    Parse one JSONL line into an event dict.
+
+    Uses orjson when installed, except for lines that may hold integers outside the
+    64-bit range; those are parsed with the stdlib so the exact int comes back.
+    Lines orjson rejects are retried with the stdlib, which also accepts the
+    NaN/Infinity tokens older stdlib-written events.jsonl files contain.
+    orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch one type.
+    """
+    if orjson is not None and _WIDE_INT_RE.search(line) is None:
+        try:
+            return orjson.loads(line)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(line)
+
+
+# run_id -> (events.jsonl opened for append, write lock) while a traced run is active.
+_open_events_files: dict[str, tuple[BinaryIO, threading.Lock]] = {}
+
 # run_id MUST be UUIDv4. We enforce canonical form (lowercase with hyphens).
-_RUN_ID_MAX_LEN = 36
+# Canonical UUIDs are exactly this long; anything else is rejected before the regex.
+_RUN_ID_LEN = 36
+# Canonical form as a regex (RFC 4122 variant). Compiled once for
+# validate_run_id_format; the server also uses it for its route parameters.
+RUN_ID_PATTERN = (
+    r"^[0-9a-f]{8}-[0-9a-f]{4}-4[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}$"
+)
+_RUN_ID_RE = re.compile(RUN_ID_PATTERN)
 
 
 def validate_run_id_format(run_id: str) -> str:
@@ -35,20 +103,7 @@ def validate_run_id_format(run_id: str) -> str:
     if not run_id or not isinstance(run_id, str):
         raise ValueError("invalid run_id")
     run_id = run_id.strip()
-    if (
-        len(run_id) > _RUN_ID_MAX_LEN
-        or ".." in run_id
-        or "/" in run_id
-        or "\\" in run_id
-    ):
-        raise ValueError("invalid run_id")
-    try:
-        u = uuid.UUID(run_id)
-    except (ValueError, TypeError, AttributeError):
-        raise ValueError("invalid run_id")
-    if u.version != 4:
-        raise ValueError("invalid run_id")
-    if str(u) != run_id:
+    if len(run_id) != _RUN_ID_LEN or _RUN_ID_RE.fullmatch(run_id) is None:
         raise ValueError("invalid run_id")
     return run_id
 
@@ -76,6 +131,80 @@ def _run_dir(run_id: str, config: MaidaConfig) -> Path:
     return path
 
 
+# Runs one in-memory store keeps; creating another evicts the oldest finished run.
+_MEMORY_MAX_RUNS = 1000
+
+
+class _MemoryBackend:
+    """
+    In-process run store used when config.storage == "memory" (MAIDA_STORAGE=memory).
+
+    Holds run.json dicts and events per run_id with the file backend's semantics:
+    events are JSON round-tripped on append and unknown run_ids raise
+    FileNotFoundError. Methods hand out the stored objects; the public storage
+    functions copy what they return. At most max_runs runs are kept: creating one
+    more evicts the oldest run that is no longer running.
+    """
+
+    def __init__(self, max_runs: int) -> None:
+        self.max_runs = max_runs
+        # run_id -> {"meta": run.json dict, "events": [event, ...]}, oldest first.
+        self._runs: dict[str, dict] = {}
+
+    def _run(self, run_id: str) -> dict:
+        validate_run_id_format(run_id)
+        run = self._runs.get(run_id)
+        if run is None:
+            raise FileNotFoundError(f"No run found for run_id '{run_id}'")
+        return run
+
+    def create_run(self, meta: dict) -> None:
+        if len(self._runs) >= self.max_runs:
+            for run_id, run in self._runs.items():
+                if run["meta"].get("status") != "running":
+                    del self._runs[run_id]
+                    break
+        self._runs[meta["run_id"]] = {"meta": copy.deepcopy(meta), "events": []}
+
+    def append_event(self, run_id: str, event: dict) -> None:
+        # Round-trip through JSON so stored events match what events.jsonl would hold.
+        line = _encode_event_line(event)
+        self._run(run_id)["events"].append(_decode_event_line(line))
+
+    def meta(self, run_id: str) -> dict:
+        """The stored run.json dict; raises FileNotFoundError if the run is unknown."""
+        return self._run(run_id)["meta"]
+
+    def metas(self) -> list[dict]:
+        """Stored run.json dicts of every run, oldest created first."""
+        return [run["meta"] for run in self._runs.values()]
+
+    def events(self, run_id: str) -> list[dict]:
+        """Stored events of the run, or [] if the run is unknown."""
+        validate_run_id_format(run_id)
+        run = self._runs.get(run_id)
+        return [] if run is None else run["events"]
+
+    def delete_run(self, run_id: str) -> None:
+        self._run(run_id)
+        del self._runs[run_id]
+
+
+# One in-memory store per str(data_dir), so tests pointing data_dir elsewhere stay apart.
+_memory_backends: dict[str, _MemoryBackend] = {}
+
+
+def _memory_backend(config: MaidaConfig) -> _MemoryBackend | None:
+    """Return the in-memory store for config, or None when runs are kept on disk."""
+    if config.storage != "memory":
+        return None
+    key = str(config.data_dir.expanduser())
+    backend = _memory_backends.get(key)
+    if backend is None:
+        backend = _memory_backends[key] = _MemoryBackend(_MEMORY_MAX_RUNS)
+    return backend
+
+
 def _run_json_path(run_id: str, config: MaidaConfig) -> Path:
     """Path to run.json for the given run_id."""
     return _run_dir(run_id, config) / RUN_JSON
@@ -93,9 +222,6 @@ def create_run(run_name: str | None, config: MaidaConfig) -> dict:
     Returns run metadata dict including run_id and paths (run_dir, run_json, events_jsonl).
     """
     run_id = str(uuid.uuid4())
-    base = _run_dir(run_id, config)
-    base.mkdir(parents=True, exist_ok=True)
-
     started_at = utc_now_iso_ms_z()
     meta = {
         "spec_version": SPEC_VERSION,
@@ -109,6 +235,15 @@ def create_run(run_name: str | None, config: MaidaConfig) -> dict:
         "last_event_ts": None,
     }
 
+    if (mem := _memory_backend(config)) is not None:
+        mem.create_run(meta)
+        return {
+            **meta,
+            "paths": {"run_dir": None, "run_json": None, "events_jsonl": None},
+        }
+
+    base = _run_dir(run_id, config)
+    base.mkdir(parents=True, exist_ok=True)
     run_json_path = _run_json_path(run_id, config)
     _atomic_write_json(run_json_path, meta)
 
@@ -128,13 +263,55 @@ def append_event(run_id: str, event: dict, config: MaidaConfig) -> None:
 
     Does not create the run dir; call create_run first.
     """
+    if (mem := _memory_backend(config)) is not None:
+        mem.append_event(run_id, event)
+        return
+    line = _encode_event_line(event)
+    held = _open_events_files.get(run_id)
+    if held is not None:
+        f, lock = held
+        with lock:
+            # close_events_file may have closed it since the lookup above.
+            if not f.closed:
+                f.write(line)
+                f.flush()
+                return
     path = _events_path(run_id, config)
-    with open(path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(event, ensure_ascii=False) + "\n")
+    with open(path, "ab") as f:
+        f.write(line)
         f.flush()
         os.fsync(f.fileno())
 
 
+def open_events_file(run_id: str, config: MaidaConfig) -> None:
+    """
+    Keep the run's events.jsonl open until close_events_file(run_id).
+
+    While open, append_event writes and flushes each line through the held file
+    (still visible to readers right away) instead of reopening it and fsyncing
+    per event; close_events_file fsyncs once. No-op for in-memory storage or if
+    the file is already held.
+    """
+    if _memory_backend(config) is not None or run_id in _open_events_files:
+        return
+    f = open(_events_path(run_id, config), "ab")
+    _open_events_files[run_id] = (f, threading.Lock())
+
+
+def close_events_file(run_id: str) -> None:
+    """Fsync and close a file held by open_events_file. No-op if none is held."""
+    held = _open_events_files.pop(run_id, None)
+    if held is None:
+        return
+    f, lock = held
+    with lock:
+        try:
+            f.flush()
+            os.fsync(f.fileno())
+        finally:
+            f.close()
+
+
 def finalize_run(
     run_id: str,
     status: str,
@@ -147,12 +324,15 @@ def finalize_run(
     started_at is read from existing run.json (written at create_run). Uses atomic
     write (temp file then replace). status must be "ok" or "error".
     """
-    path = _run_json_path(run_id, config)
-    if not path.is_file():
-        raise FileNotFoundError(f"run.json not found for run_id={run_id}")
-
-    with open(path, "r", encoding="utf-8") as f:
-        meta = json.load(f)
+    if (mem := _memory_backend(config)) is not None:
+        path = None
+        meta = mem.meta(run_id)  # updated in place below
+    else:
+        path = _run_json_path(run_id, config)
+        if not path.is_file():
+            raise FileNotFoundError(f"run.json not found for run_id={run_id}")
+        with open(path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
 
     ended_at = utc_now_iso_ms_z()
     started_at = meta.get("started_at") or ended_at
@@ -171,7 +351,8 @@ def finalize_run(
     meta["counts"] = merged_counts
     meta["last_event_ts"] = ended_at  # v0.1: set at finalize (last event is RUN_END)
 
-    _atomic_write_json(path, meta)
+    if path is not None:
+        _atomic_write_json(path, meta)
 
 
 def _atomic_write_json(path: Path, data: dict) -> None:
@@ -208,6 +389,27 @@ def resolve_run_id(prefix: str, config: MaidaConfig) -> str:
     prefix = prefix.strip()
     if ".." in prefix or "/" in prefix or "\\" in prefix:
         raise FileNotFoundError("Run ID is required")
+
+    mem = _memory_backend(config)
+    if mem is not None:
+        candidates = [
+            (_started_at(meta), meta["run_id"])
+            for meta in mem.metas()
+            if meta["run_id"].startswith(prefix)
+        ]
+    else:
+        candidates = _disk_prefix_candidates(prefix, config)
+    if not candidates:
+        raise FileNotFoundError(f"No run found matching '{prefix}'")
+
+    candidates.sort(key=_started_at_sort_key, reverse=True)
+    return candidates[0][1]
+
+
+def _disk_prefix_candidates(
+    prefix: str, config: MaidaConfig
+) -> list[tuple[datetime | None, str]]:
+    """(started_at, run_id) for each run directory whose name starts with prefix."""
     runs_base = _runs_dir(config)
     if not runs_base.is_dir():
         raise FileNotFoundError(f"No runs directory at {runs_base}")
@@ -231,25 +433,16 @@ def resolve_run_id(prefix: str, config: MaidaConfig) -> str:
                 meta = json.load(f)
         except (json.JSONDecodeError, OSError):
             continue
-        started_str = meta.get("started_at")
-        started_dt = _parse_iso8601_utc(started_str) if started_str else None
-        candidates.append((started_dt, rid))
-
-    if not candidates:
-        raise FileNotFoundError(f"No run found matching '{prefix}'")
-
-    def sort_key(item: tuple[datetime | None, str]) -> tuple[bool, datetime]:
-        dt, _ = item
-        return (dt is None, dt or datetime.min.replace(tzinfo=timezone.utc))
-
-    candidates.sort(key=sort_key, reverse=True)
-    return candidates[0][1]
+        candidates.append((_started_at(meta), rid))
+    return candidates
 
 
 def load_run_meta(run_id: str, config: MaidaConfig) -> dict:
     """
     Load run metadata from run.json. Raises FileNotFoundError if run or run.json missing.
     """
+    if (mem := _memory_backend(config)) is not None:
+        return copy.deepcopy(mem.meta(run_id))
     path = _run_json_path(run_id, config)
     if not path.is_file():
         raise FileNotFoundError(f"No run found for run_id '{run_id}'")
@@ -272,6 +465,18 @@ def _parse_iso8601_utc(s: str) -> datetime | None:
         return None
 
 
+def _started_at(meta: dict) -> datetime | None:
+    """Parsed started_at of a run.json dict; None if missing or invalid."""
+    started_str = meta.get("started_at")
+    return _parse_iso8601_utc(started_str) if started_str else None
+
+
+def _started_at_sort_key(item: tuple[datetime | None, object]) -> tuple[bool, datetime]:
+    """Sort key for (started_at, ...) pairs; with reverse=True, missing started_at sorts last."""
+    dt = item[0]
+    return (dt is None, dt or datetime.min.replace(tzinfo=timezone.utc))
+
+
 def list_runs(limit: int, config: MaidaConfig) -> list[dict]:
     """
     List most recent runs by started_at descending. Does not parse events.jsonl.
@@ -280,11 +485,22 @@ def list_runs(limit: int, config: MaidaConfig) -> list[dict]:
     differ (e.g. with/without milliseconds). Runs with missing/invalid started_at
     sort last. Returns list of run metadata dicts (from run.json only), up to limit.
     """
+    mem = _memory_backend(config)
+    metas = mem.metas() if mem is not None else _disk_run_metas(config)
+    candidates = [(_started_at(meta), meta) for meta in metas]
+    # None sorts before datetime in Python 3, so put (None, meta) last when desc
+    candidates.sort(key=_started_at_sort_key, reverse=True)
+    runs = [meta for _, meta in candidates[:limit]]
+    return copy.deepcopy(runs) if mem is not None else runs
+
+
+def _disk_run_metas(config: MaidaConfig) -> list[dict]:
+    """run.json dicts of every run directory with a readable run.json."""
     runs_base = _runs_dir(config)
     if not runs_base.is_dir():
         return []
 
-    candidates: list[tuple[datetime | None, dict]] = []
+    metas: list[dict] = []
     for entry in runs_base.iterdir():
         if not entry.is_dir():
             continue
@@ -293,48 +509,103 @@ def list_runs(limit: int, config: MaidaConfig) -> list[dict]:
             continue
         try:
             with open(run_json, "r", encoding="utf-8") as f:
-                meta = json.load(f)
+                metas.append(json.load(f))
         except (json.JSONDecodeError, OSError):
             continue
-        started_str = meta.get("started_at")
-        started_dt = _parse_iso8601_utc(started_str) if started_str else None
-        candidates.append((started_dt, meta))
-
-    # None sorts before datetime in Python 3, so put (None, meta) last when desc
-    def sort_key(item: tuple[datetime | None, dict]) -> tuple[bool, datetime]:
-        dt, _ = item
-        return (dt is None, dt or datetime.min.replace(tzinfo=timezone.utc))
-
-    candidates.sort(key=sort_key, reverse=True)
-    return [meta for _, meta in candidates[:limit]]
+    return metas
 
 
-def load_events(run_id: str, config: MaidaConfig) -> list[dict]:
+def load_events(
+    run_id: str, config: MaidaConfig, types: Collection[str] | None = None
+) -> list[dict]:
     """
     Read events.jsonl for the run and return a list of event dicts.
 
-    Returns [] if the file is missing or empty.
+    If types is given, only events whose event_type is in it are returned; lines
+    that cannot match (the quoted type name does not occur) are skipped without
+    being parsed, and lines that are not JSON objects are skipped. Returns [] if
+    the file is missing or empty.
     """
+    if (mem := _memory_backend(config)) is not None:
+        events = mem.events(run_id)
+        if types is not None:
+            events = [e for e in events if e.get("event_type") in types]
+        return copy.deepcopy(events)
     path = _events_path(run_id, config)
     if not path.is_file():
         return []
-    events: list[dict] = []
-    with open(path, "r", encoding="utf-8") as f:
-        for line_no, line in enumerate(f, start=1):
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                events.append(json.loads(line))
-            except json.JSONDecodeError as e:
-                logger.warning(
-                    "load_events: skipping corrupt JSONL line run_id=%s line=%s: %s",
-                    run_id,
-                    line_no,
-                    e,
-                )
-                continue
-    return events
+    needles = None if types is None else [f'"{t}"'.encode() for t in types]
+    return [
+        event
+        for event in _iter_events_file(run_id, path, needles)
+        if types is None
+        or (isinstance(event, dict) and event.get("event_type") in types)
+    ]
+
+
+def _iter_events_file(
+    run_id: str, path: Path, needles: list[bytes] | None
+) -> Iterator[dict]:
+    """
+    Decode events.jsonl one line at a time, skipping blank and corrupt lines.
+
+    With needles, lines containing none of them are skipped without being parsed.
+    Corrupt lines (bad JSON, invalid UTF-8, a partial last line) are logged.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return  # mmap cannot map an empty file
+        # Map the file read-only and slice out one line at a time; with needles,
+        # non-matching lines are rejected in place without being copied.
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            line_no = 0
+            while start < size:
+                end = mm.find(b"\n", start)
+                if end == -1:
+                    end = size
+                line_no += 1
+                line_start, start = start, end + 1
+                if needles is not None and all(
+                    mm.find(n, line_start, end) == -1 for n in needles
+                ):
+                    continue
+                line = mm[line_start:end].strip()
+                if not line:
+                    continue
+                try:
+                    event = _decode_event_line(line)
+                except ValueError as e:  # JSONDecodeError or invalid UTF-8
+                    logger.warning(
+                        "load_events: skipping corrupt JSONL line run_id=%s line=%s: %s",
+                        run_id,
+                        line_no,
+                        e,
+                    )
+                    continue
+                yield event
+
+
+def load_event_types(run_id: str, config: MaidaConfig) -> Iterator[str]:
+    """
+    Yield the event_type of each event in events.jsonl, in order.
+
+    Streams the file instead of building the full event list. Skips the same
+    blank and corrupt lines as load_events, plus events without a string
+    event_type. Yields nothing if the file is missing.
+    """
+    if (mem := _memory_backend(config)) is not None:
+        events: Iterator[dict] = iter(mem.events(run_id))
+    else:
+        path = _events_path(run_id, config)
+        if not path.is_file():
+            return
+        events = _iter_events_file(run_id, path, None)
+    for event in events:
+        event_type = event.get("event_type") if isinstance(event, dict) else None
+        if isinstance(event_type, str):
+            yield event_type
 
 
 def get_run_paths(run_id: str, config: MaidaConfig) -> dict:
@@ -342,8 +613,11 @@ def get_run_paths(run_id: str, config: MaidaConfig) -> dict:
     Return local filesystem paths for a run.
 
     Used by the viewer UI to expose "Copy path" for run.json without
-    changing the on-disk run.json schema.
+    changing the on-disk run.json schema. In-memory runs have no paths (all None).
     """
+    if (mem := _memory_backend(config)) is not None:
+        mem.meta(run_id)  # raises like the file backend for unknown runs
+        return {"run_dir": None, "run_json": None, "events_jsonl": None}
     run_dir = _run_dir(run_id, config)
     run_json = run_dir / RUN_JSON
     events_jsonl = run_dir / EVENTS_JSONL
@@ -362,14 +636,21 @@ def rename_run(run_id: str, run_name: str, config: MaidaConfig) -> dict:
 
     Does not touch events.jsonl or any other fields.
     """
-    path = _run_json_path(run_id, config)
-    if not path.is_file():
-        raise FileNotFoundError(f"No run found for run_id '{run_id}'")
+    mem = _memory_backend(config)
+    if mem is not None:
+        meta = mem.meta(run_id)
+    else:
+        path = _run_json_path(run_id, config)
+        if not path.is_file():
+            raise FileNotFoundError(f"No run found for run_id '{run_id}'")
 
     new_name = (run_name or "").strip()
     if not new_name:
         raise ValueError("run_name must be non-empty")
 
+    if mem is not None:
+        meta["run_name"] = new_name
+        return copy.deepcopy(meta)
     with open(path, "r", encoding="utf-8") as f:
         meta = json.load(f)
     meta["run_name"] = new_name
@@ -383,6 +664,9 @@ def delete_run(run_id: str, config: MaidaConfig) -> None:
 
     Caller is responsible for ensuring the run is no longer needed.
     """
+    if (mem := _memory_backend(config)) is not None:
+        mem.delete_run(run_id)
+        return
     run_dir = _run_dir(run_id, config)
     if not run_dir.is_dir():
         raise FileNotFoundError(f"No run found for run_id '{run_id}'")
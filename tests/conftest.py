@@ -2,39 +2,120 @@
 Shared pytest fixtures and helpers for Maida tests.
 """
 
-import os
-import tempfile
-from pathlib import Path
+import dataclasses
+from types import SimpleNamespace
 
 import pytest
 
+from maida.config import MaidaConfig, load_config
+
+
+@pytest.fixture(scope="session")
+def _precomputed_defaults() -> MaidaConfig:
+    """load_config() evaluated once per session; per-test configs only swap data_dir."""
+    return load_config()
+
+
+@pytest.fixture(scope="module")
+def module_data_dir(tmp_path_factory):
+    """A temporary data directory, created once and shared by the tests of one module."""
+    return tmp_path_factory.mktemp("maida")
+
+
+@pytest.fixture
+def temp_data_dir(module_data_dir, monkeypatch):
+    """Point MAIDA_DATA_DIR at the module's shared data directory for this test only."""
+    monkeypatch.setenv("MAIDA_DATA_DIR", str(module_data_dir))
+    return module_data_dir
+
+
+@pytest.fixture
+def memory_storage(monkeypatch):
+    """Keep runs in process memory (MAIDA_STORAGE=memory), starting empty for each test."""
+    from maida import storage
+
+    monkeypatch.setenv("MAIDA_STORAGE", "memory")
+    monkeypatch.setattr(storage, "_memory_backends", {})
+
 
 @pytest.fixture
-def temp_data_dir():
-    """Create a temporary directory and set MAIDA_DATA_DIR to it for the test."""
-    with tempfile.TemporaryDirectory() as tmp:
-        old = os.environ.get("MAIDA_DATA_DIR")
-        try:
-            os.environ["MAIDA_DATA_DIR"] = tmp
-            yield Path(tmp)
-        finally:
-            if old is not None:
-                os.environ["MAIDA_DATA_DIR"] = old
-            elif "MAIDA_DATA_DIR" in os.environ:
-                os.environ.pop("MAIDA_DATA_DIR")
-
-
-def get_latest_run_id(config):
+def config(_precomputed_defaults, temp_data_dir) -> MaidaConfig:
     """
-    Return run_id of the most recent run for the given config.
+    Session defaults with data_dir set to temp_data_dir, without re-reading YAML.
 
-    Use when the test has just created a single run in a temp dir (so the
-    latest run is the one we care about). If the code under test starts
-    writing multiple runs, prefer selecting by run_name or another stable
-    attribute instead.
+    Only for tests that do not change MAIDA_* env; those must call load_config().
     """
-    from maida.storage import list_runs
+    return dataclasses.replace(_precomputed_defaults, data_dir=temp_data_dir)
+
+
+@pytest.fixture
+def started_run_ids(monkeypatch) -> list[str]:
+    """
+    run_ids of the runs @trace / traced_run start during the test, in start order.
+
+    Lets a test find its run without scanning the data dir or naming the run.
+    """
+    from maida._tracing import _lifecycle
+
+    run_ids: list[str] = []
+    create_run = _lifecycle.create_run
+
+    def _recording_create_run(*args, **kwargs):
+        meta = create_run(*args, **kwargs)
+        run_ids.append(meta["run_id"])
+        return meta
+
+    monkeypatch.setattr(_lifecycle, "create_run", _recording_create_run)
+    return run_ids
+
+
+def make_fake_llm_context(
+    *,
+    executor=None,
+    messages=None,
+    agent_role="Researcher",
+    task_description="Do research",
+    crew=None,
+    llm=None,
+    iterations=0,
+    response=None,
+):
+    """Fake LLMCallHookContext: executor, messages (mutable list), agent.role, task.description, crew, llm, iterations, response."""
+    executor = executor if executor is not None else SimpleNamespace()
+    messages = list(messages) if messages is not None else []
+    crew = crew if crew is not None else SimpleNamespace()
+    llm = llm if llm is not None else SimpleNamespace(model_name="gpt-4")
+    return SimpleNamespace(
+        executor=executor,
+        messages=messages,
+        agent=SimpleNamespace(role=agent_role),
+        task=SimpleNamespace(description=task_description),
+        crew=crew,
+        llm=llm,
+        iterations=iterations,
+        response=response,
+    )
+
 
-    runs = list_runs(limit=1, config=config)
-    assert runs, "expected at least one run"
-    return runs[0]["run_id"]
+def make_fake_tool_context(
+    *,
+    tool_name="search",
+    tool_input=None,
+    tool=None,
+    agent_role="Researcher",
+    task_description="Do research",
+    crew=None,
+    tool_result=None,
+):
+    """Fake ToolCallHookContext: tool_name, tool_input (mutable dict), tool (optional), agent, task, crew, tool_result."""
+    tool_input = dict(tool_input) if tool_input is not None else {}
+    crew = crew if crew is not None else SimpleNamespace()
+    return SimpleNamespace(
+        tool_name=tool_name,
+        tool_input=tool_input,
+        tool=tool,
+        agent=SimpleNamespace(role=agent_role),
+        task=SimpleNamespace(description=task_description),
+        crew=crew,
+        tool_result=tool_result,
+    )
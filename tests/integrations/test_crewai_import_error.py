@@ -0,0 +1,25 @@
+"""
+Import-error test for the CrewAI integration, kept apart from test_crewai_integration.py.
+
+That module imports maida.integrations.crewai once against a mocked crewai for all of
+its tests; this test needs crewai to look uninstalled instead.
+"""
+
+import sys
+
+import pytest
+
+from maida.integrations._error import MissingOptionalDependencyError
+
+CREWAI_MISSING_MSG = "CrewAI integration requires optional deps. Install with `pip install maida-ai[crewai]`."
+
+
+def test_import_crewai_without_extra_raises_clear_error(monkeypatch):
+    """If CrewAI is not installed, importing maida.integrations.crewai raises that friendly error string."""
+    # monkeypatch restores both entries (including a previously imported integration).
+    monkeypatch.delitem(sys.modules, "maida.integrations.crewai", raising=False)
+    # None in sys.modules makes crewai unimportable (find_spec returns None).
+    monkeypatch.setitem(sys.modules, "crewai", None)
+    with pytest.raises(MissingOptionalDependencyError) as exc_info:
+        __import__("maida.integrations.crewai")
+    assert str(exc_info.value) == CREWAI_MISSING_MSG
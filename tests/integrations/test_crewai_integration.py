@@ -1,74 +1,19 @@
 """
 Unit tests for CrewAI integration: pending logic, run-exit flush, and gating.
 
-Tests avoid requiring CrewAI at runtime by mocking crewai.hooks for import
+Tests avoid requiring CrewAI at runtime by stubbing crewai / crewai.hooks for import
 and using fake context objects shaped like CrewAI LLMCallHookContext / ToolCallHookContext.
 No crewai package is imported in this module.
 """
 
 import sys
-from types import SimpleNamespace
-from unittest.mock import MagicMock, patch
+from types import ModuleType, SimpleNamespace
+from unittest.mock import patch
 
 import pytest
 
 from maida._integration_utils import _clear_test_run_lifecycle_registry
-from maida.integrations._error import MissingOptionalDependencyError
-
-
-# --- Minimal fake context classes (CrewAI-shaped, no crewai import) ---
-
-
-def make_fake_llm_context(
-    *,
-    executor=None,
-    messages=None,
-    agent_role="Researcher",
-    task_description="Do research",
-    crew=None,
-    llm=None,
-    iterations=0,
-    response=None,
-):
-    """Fake LLMCallHookContext: executor, messages (mutable list), agent.role, task.description, crew, llm, iterations, response."""
-    executor = executor if executor is not None else SimpleNamespace()
-    messages = list(messages) if messages is not None else []
-    crew = crew if crew is not None else SimpleNamespace()
-    llm = llm if llm is not None else SimpleNamespace(model_name="gpt-4")
-    return SimpleNamespace(
-        executor=executor,
-        messages=messages,
-        agent=SimpleNamespace(role=agent_role),
-        task=SimpleNamespace(description=task_description),
-        crew=crew,
-        llm=llm,
-        iterations=iterations,
-        response=response,
-    )
-
-
-def make_fake_tool_context(
-    *,
-    tool_name="search",
-    tool_input=None,
-    tool=None,
-    agent_role="Researcher",
-    task_description="Do research",
-    crew=None,
-    tool_result=None,
-):
-    """Fake ToolCallHookContext: tool_name, tool_input (mutable dict), tool (optional), agent, task, crew, tool_result."""
-    tool_input = dict(tool_input) if tool_input is not None else {}
-    crew = crew if crew is not None else SimpleNamespace()
-    return SimpleNamespace(
-        tool_name=tool_name,
-        tool_input=tool_input,
-        tool=tool,
-        agent=SimpleNamespace(role=agent_role),
-        task=SimpleNamespace(description=task_description),
-        crew=crew,
-        tool_result=tool_result,
-    )
+from tests.conftest import make_fake_llm_context, make_fake_tool_context
 
 
 @pytest.fixture(autouse=True)
@@ -79,264 +24,309 @@ def clear_lifecycle_registry():
     _clear_test_run_lifecycle_registry()
 
 
-def _make_fake_crewai_hooks_import_error():
-    """Make 'from crewai.hooks import ...' raise ImportError so we test optional-deps message."""
-
-    class HooksFake:
-        def __getattr__(self, name):
-            raise ImportError("No module named 'crewai.hooks'")
-
-    crewai_fake = type(sys)("crewai")
-    crewai_fake.hooks = HooksFake()
-    return crewai_fake
-
+_HOOK_REGISTRARS = (
+    "register_before_llm_call_hook",
+    "register_after_llm_call_hook",
+    "register_before_tool_call_hook",
+    "register_after_tool_call_hook",
+)
+
+
+def _make_fake_crewai_hooks() -> ModuleType:
+    """Stub crewai.hooks whose register_* functions append (name, hook) to `registered`."""
+    hooks = ModuleType("crewai.hooks")
+    hooks.registered = []
+    for name in _HOOK_REGISTRARS:
+        setattr(
+            hooks,
+            name,
+            lambda hook, _name=name: hooks.registered.append((_name, hook)),
+        )
+    return hooks
+
+
+@pytest.fixture(scope="module")
+def crewai_module():
+    """
+    Import maida.integrations.crewai once for this module, with crewai / crewai.hooks stubbed.
+
+    Importing the integration is the expensive part of these tests, so it happens once;
+    reset_crewai_state gives each test empty pending maps and unregistered hooks.
+    """
+    fake_modules = {
+        "crewai": ModuleType("crewai"),
+        "crewai.hooks": _make_fake_crewai_hooks(),
+    }
+    with patch.dict("sys.modules", fake_modules):
+        sys.modules.pop("maida.integrations.crewai", None)
+        import maida.integrations.crewai as crewai_mod
 
-CREWAI_MISSING_MSG = "CrewAI integration requires optional deps. Install with `pip install maida-ai[crewai]`."
+        yield crewai_mod
 
 
-def test_import_crewai_without_extra_raises_clear_error():
-    """If CrewAI is not installed, importing maida.integrations.crewai raises that friendly error string."""
-    to_restore_mods = []
-    for mod in list(sys.modules.keys()):
-        if mod == "maida.integrations.crewai" or mod.startswith(
-            "maida.integrations.crewai."
-        ):
-            to_restore_mods.append((mod, sys.modules.pop(mod)))
-    old_crewai = sys.modules.get("crewai")
-    fake = _make_fake_crewai_hooks_import_error()
-    try:
-        sys.modules["crewai"] = fake
-        with pytest.raises(MissingOptionalDependencyError) as exc_info:
-            __import__("maida.integrations.crewai")
-        assert str(exc_info.value) == CREWAI_MISSING_MSG
-    finally:
-        if old_crewai is not None:
-            sys.modules["crewai"] = old_crewai
-        elif "crewai" in sys.modules and sys.modules["crewai"] is fake:
-            del sys.modules["crewai"]
-        for mod, val in to_restore_mods:
-            sys.modules[mod] = val
-        if "maida.integrations.crewai" not in sys.modules:
-            try:
-                __import__("maida.integrations.crewai")
-            except MissingOptionalDependencyError:
-                pass
-
-
-@pytest.fixture
-def crewai_module_with_mocked_hooks():
-    """Load maida.integrations.crewai with crewai.hooks mocked so no real CrewAI is required."""
-    # Provide a minimal hooks module that has the four register functions (no-ops)
-    hooks = MagicMock()
-    with patch.dict("sys.modules", {"crewai": MagicMock(), "crewai.hooks": hooks}):
-        # Force reimport so our patch is used
-        for mod in list(sys.modules.keys()):
-            if mod == "maida.integrations.crewai":
-                del sys.modules[mod]
-                break
-        try:
-            import maida.integrations.crewai as crewai_mod
-
-            yield crewai_mod
-        finally:
-            pass
+@pytest.fixture(autouse=True)
+def reset_crewai_state(crewai_module, mocker):
+    """Give each test empty per-run pending maps and unregistered hooks on the shared module."""
+    for state in (
+        crewai_module._pending_llm,
+        crewai_module._llm_stack,
+        crewai_module._llm_next_seq,
+        crewai_module._pending_tool,
+    ):
+        mocker.patch.dict(state, clear=True)
+    mocker.patch.object(crewai_module, "_crewai_hooks_registered", False)
+    mocker.patch.object(crewai_module, "_crewai_hooks_unavailable", False)
+    mocker.patch.object(sys.modules["crewai.hooks"], "registered", [])
+
+
+def test_crewai_hooks_registered_on_first_run_enter_only(
+    crewai_module,
+):
+    """crewai.hooks is imported and our hooks registered on run_enter, once per process."""
+    crewai = crewai_module
+    hooks = sys.modules["crewai.hooks"]
+    assert hooks.registered == []
+    crewai._on_run_enter()
+    crewai._on_run_enter()
+    assert hooks.registered == [
+        ("register_before_llm_call_hook", crewai._before_llm_call),
+        ("register_after_llm_call_hook", crewai._after_llm_call),
+        ("register_before_tool_call_hook", crewai._before_tool_call),
+        ("register_after_tool_call_hook", crewai._after_tool_call),
+    ]
+
+
+def test_run_enter_warns_when_crewai_has_no_hooks_module(
+    crewai_module, monkeypatch, caplog
+):
+    """crewai installed without crewai.hooks: the first run_enter warns once, later runs stay quiet."""
+    # None in sys.modules makes `from crewai.hooks import ...` raise ImportError.
+    monkeypatch.setitem(sys.modules, "crewai.hooks", None)
+    with caplog.at_level("WARNING", logger="maida.integrations.crewai"):
+        crewai_module._on_run_enter()
+        crewai_module._on_run_enter()
+    assert crewai_module._crewai_hooks_registered is False
+    assert caplog.text.count("crewai.hooks could not be imported") == 1
 
 
 def test_gating_no_active_run_handlers_no_op_and_do_not_record(
-    crewai_module_with_mocked_hooks, temp_data_dir
+    crewai_module, temp_data_dir, mocker
 ):
     """When there is no active Maida run id, hook handlers no-op and do not record events."""
-    crewai = crewai_module_with_mocked_hooks
+    crewai = crewai_module
     llm_ctx = make_fake_llm_context(messages=[{"role": "user", "content": "hi"}])
     tool_ctx = make_fake_tool_context(tool_name="search", tool_input={"q": "x"})
-    with patch.object(crewai, "_get_active_run_id", return_value=None):
-        with patch.object(crewai, "record_llm_call", MagicMock()) as record_llm:
-            with patch.object(crewai, "record_tool_call", MagicMock()) as record_tool:
-                crewai._before_llm_call(llm_ctx)
-                crewai._after_llm_call(llm_ctx)
-                crewai._before_tool_call(tool_ctx)
-                crewai._after_tool_call(tool_ctx)
-                record_llm.assert_not_called()
-                record_tool.assert_not_called()
+    mocker.patch.object(crewai, "_get_active_run_id", return_value=None)
+    record_llm = mocker.patch.object(crewai, "record_llm_call")
+    record_tool = mocker.patch.object(crewai, "record_tool_call")
+    crewai._before_llm_call(llm_ctx)
+    crewai._after_llm_call(llm_ctx)
+    crewai._before_tool_call(tool_ctx)
+    crewai._after_tool_call(tool_ctx)
+    record_llm.assert_not_called()
+    record_tool.assert_not_called()
     assert not crewai._pending_llm
     assert not crewai._pending_tool
 
 
-def test_before_llm_then_after_llm_emits_one_llm_call_with_duration_and_ok(
-    crewai_module_with_mocked_hooks, temp_data_dir
-):
-    """before_llm then after_llm emits one LLM_CALL with duration_ms and status='ok'."""
-    crewai = crewai_module_with_mocked_hooks
-    run_id = "test-run-llm"
-    llm_ctx = make_fake_llm_context(
-        messages=[{"role": "user", "content": "hi"}],
-        response="Hello!",
-    )
-    with patch.object(crewai, "_get_active_run_id", return_value=run_id):
-        crewai._before_llm_call(llm_ctx)
-        with patch.object(crewai, "record_llm_call", MagicMock()) as record:
-            crewai._after_llm_call(llm_ctx)
-            record.assert_called_once()
-            kw = record.call_args.kwargs
-            assert kw["status"] == "ok"
-            assert kw["response"] == "Hello!"
-            assert kw["model"] == "gpt-4"
-            meta = kw.get("meta") or {}
-            assert meta.get("crewai", {}).get("duration_ms") is not None
-            assert meta["crewai"]["duration_ms"] >= 0
-    assert not crewai._pending_llm.get(run_id) or len(crewai._pending_llm[run_id]) == 0
-
-
-def test_before_tool_then_after_tool_emits_one_tool_call_with_duration_and_ok(
-    crewai_module_with_mocked_hooks, temp_data_dir
-):
-    """before_tool then after_tool emits one TOOL_CALL with duration_ms and status='ok'."""
-    crewai = crewai_module_with_mocked_hooks
-    run_id = "test-run-tool"
-    tool_ctx = make_fake_tool_context(
-        tool_name="search", tool_input={"q": "x"}, tool_result={"hits": 2}
-    )
-    with patch.object(crewai, "_get_active_run_id", return_value=run_id):
-        crewai._before_tool_call(tool_ctx)
-        with patch.object(crewai, "record_tool_call", MagicMock()) as record:
-            crewai._after_tool_call(tool_ctx)
-            record.assert_called_once()
-            kw = record.call_args.kwargs
-            assert kw["status"] == "ok"
-            assert kw["name"] == "search"
-            assert kw["args"] == {"q": "x"}
-            assert kw["result"] == {"hits": 2}
-            meta = kw.get("meta") or {}
-            assert meta.get("crewai", {}).get("duration_ms") is not None
-            assert meta["crewai"]["duration_ms"] >= 0
-    assert (
-        not crewai._pending_tool.get(run_id) or len(crewai._pending_tool[run_id]) == 0
-    )
-
-
-def test_missing_after_tool_run_exit_emits_tool_call_error_missing_after_hook(
-    crewai_module_with_mocked_hooks, temp_data_dir
+# kind -> (before hook, after hook, recorder, pending map) on the crewai module.
+_HOOKS = {
+    "llm": ("_before_llm_call", "_after_llm_call", "record_llm_call", "_pending_llm"),
+    "tool": (
+        "_before_tool_call",
+        "_after_tool_call",
+        "record_tool_call",
+        "_pending_tool",
+    ),
+}
+
+# kind -> (context factory, recorder kwargs expected for that context).
+_ROUND_TRIP_CASES = {
+    "llm": (
+        lambda: make_fake_llm_context(
+            messages=[{"role": "user", "content": "hi"}], response="Hello!"
+        ),
+        {
+            "model": "gpt-4",
+            "prompt": [{"role": "user", "content": "hi"}],
+            "response": "Hello!",
+        },
+    ),
+    "tool": (
+        lambda: make_fake_tool_context(
+            tool_name="search", tool_input={"q": "x"}, tool_result={"hits": 2}
+        ),
+        {"name": "search", "args": {"q": "x"}, "result": {"hits": 2}},
+    ),
+}
+
+
+@pytest.mark.parametrize("kind", ["llm", "tool"])
+def test_before_then_after_emits_one_call_with_duration_and_ok(
+    crewai_module, temp_data_dir, mocker, kind
 ):
-    """before_tool occurs; run exits with exception; one TOOL_CALL emitted with status='error' and meta.crewai.completion='missing_after_hook'."""
-    crewai = crewai_module_with_mocked_hooks
-    run_id = "missing-after-tool-run"
-    tool_ctx = make_fake_tool_context(
-        tool_name="fetch", tool_input={"url": "https://x.com"}
-    )
-    with patch.object(crewai, "_get_active_run_id", return_value=run_id):
-        crewai._before_tool_call(tool_ctx)
+    """before_* then after_* emits one LLM_CALL / TOOL_CALL with duration_ms and status='ok'."""
+    crewai = crewai_module
+    before, after, recorder, pending = _HOOKS[kind]
+    make_ctx, expected = _ROUND_TRIP_CASES[kind]
+    run_id = f"test-run-{kind}"
+    ctx = make_ctx()
+    mocker.patch.object(crewai, "_get_active_run_id", return_value=run_id)
+    record = mocker.patch.object(crewai, recorder)
+    getattr(crewai, before)(ctx)
+    getattr(crewai, after)(ctx)
+    record.assert_called_once()
+    kw = record.call_args.kwargs
+    assert kw["status"] == "ok"
+    for key, value in expected.items():
+        assert kw[key] == value
+    assert kw["meta"]["crewai"]["duration_ms"] >= 0
+    assert not getattr(crewai, pending).get(run_id)
+
+
+def _seed_pending(crewai, mocker, run_id, kinds=("llm", "tool")):
+    """Open one before_* call per kind for run_id, as if its after_* never ran."""
+    mocker.patch.object(crewai, "_get_active_run_id", return_value=run_id)
+    for kind in kinds:
+        before = _HOOKS[kind][0]
+        make_ctx = _ROUND_TRIP_CASES[kind][0]
+        getattr(crewai, before)(make_ctx())
+
+
+@pytest.fixture(scope="module")
+def value_error_exc_info():
+    """exc_info for a real raised ValueError (with traceback), captured once per module."""
     try:
         raise ValueError("run failed")
     except ValueError:
-        exc_type, exc_value, tb = sys.exc_info()
-    with patch.object(crewai, "record_tool_call", MagicMock()) as record:
-        crewai._flush_pending_for_run(run_id, exc_type, exc_value, tb)
-    record.assert_called_once()
-    kw = record.call_args.kwargs
-    assert kw["status"] == "error"
-    assert (kw.get("meta") or {}).get("crewai", {}).get(
-        "completion"
-    ) == "missing_after_hook"
-    assert kw.get("error") is not None
-    assert kw["error"].get("error_type") == "ValueError"
-    assert run_id not in crewai._pending_tool
+        return sys.exc_info()
 
 
-def test_missing_after_llm_run_exit_emits_llm_call_error_missing_after_hook(
-    crewai_module_with_mocked_hooks, temp_data_dir
+@pytest.mark.parametrize("kind", ["llm", "tool"])
+@pytest.mark.parametrize("raised", [True, False], ids=["exception", "clean_exit"])
+def test_missing_after_hook_flushed_on_run_exit_as_error(
+    crewai_module, temp_data_dir, mocker, value_error_exc_info, kind, raised
 ):
-    """before_llm occurs; run exits with exception; one LLM_CALL emitted with status='error' and meta.crewai.completion='missing_after_hook'."""
-    crewai = crewai_module_with_mocked_hooks
-    run_id = "missing-after-llm-run"
-    llm_ctx = make_fake_llm_context(messages=[{"role": "user", "content": "go"}])
-    with patch.object(crewai, "_get_active_run_id", return_value=run_id):
-        crewai._before_llm_call(llm_ctx)
-    try:
-        raise RuntimeError("run crashed")
-    except RuntimeError:
-        exc_type, exc_value, tb = sys.exc_info()
-    with patch.object(crewai, "record_llm_call", MagicMock()) as record:
-        crewai._flush_pending_for_run(run_id, exc_type, exc_value, tb)
+    """
+    A before_* with no after_* is flushed on run exit as status='error' with
+    meta.crewai.completion='missing_after_hook'. The error carries the run's
+    exception (type, message, stack) or IncompleteCall on a clean exit.
+    """
+    crewai = crewai_module
+    _before, _after, recorder, pending = _HOOKS[kind]
+    run_id = f"missing-after-{kind}-run"
+    record = mocker.patch.object(crewai, recorder)
+    _seed_pending(crewai, mocker, run_id, kinds=(kind,))
+    exc_type, exc_value, tb = value_error_exc_info if raised else (None, None, None)
+    crewai._flush_pending_for_run(run_id, exc_type, exc_value, tb)
     record.assert_called_once()
     kw = record.call_args.kwargs
     assert kw["status"] == "error"
-    assert (kw.get("meta") or {}).get("crewai", {}).get(
-        "completion"
-    ) == "missing_after_hook"
-    assert kw.get("error") is not None
-    assert kw["error"].get("error_type") == "RuntimeError"
-    assert run_id not in crewai._pending_llm
+    assert kw["meta"]["crewai"]["completion"] == "missing_after_hook"
+    error = kw["error"]
+    if exc_type is None:
+        assert error["error_type"] == "IncompleteCall"
+        assert error["stack"] is None
+    else:
+        assert error["error_type"] == "ValueError"
+        assert "run failed" in error["message"]
+        assert "ValueError" in error["stack"]
+    assert run_id not in getattr(crewai, pending)
+
+
+def test_flush_pending_clears_only_the_exiting_runs_bookkeeping(
+    crewai_module, temp_data_dir, mocker
+):
+    """Run exit drops per-run stacks/sequence counters for that run and leaves other runs intact."""
+    crewai = crewai_module
+    mocker.patch.object(crewai, "record_llm_call")
+    mocker.patch.object(crewai, "record_tool_call")
+    for run_id in ("run-a", "run-b"):
+        _seed_pending(crewai, mocker, run_id)
+    crewai._flush_pending_for_run("run-a", None, None, None)
+    for state in (
+        crewai._pending_llm,
+        crewai._llm_stack,
+        crewai._llm_next_seq,
+        crewai._pending_tool,
+    ):
+        assert "run-a" not in state
+        assert "run-b" in state
+
+
+def test_flush_with_nothing_pending_skips_traceback_and_clears_state(
+    crewai_module, temp_data_dir, mocker, value_error_exc_info
+):
+    """A clean run exit records nothing and never formats the exception traceback."""
+    crewai = crewai_module
+    run_id = "clean-run"
+    llm_ctx = make_fake_llm_context()
+    mocker.patch.object(crewai, "_get_active_run_id", return_value=run_id)
+    record = mocker.patch.object(crewai, "record_llm_call")
+    crewai._before_llm_call(llm_ctx)
+    crewai._after_llm_call(llm_ctx)
+    record.assert_called_once()
+    fmt = mocker.patch.object(crewai.traceback, "format_exception")
+    crewai._flush_pending_for_run(run_id, *value_error_exc_info)
+    fmt.assert_not_called()
+    record.assert_called_once()
+    assert run_id not in crewai._llm_stack
+    assert run_id not in crewai._llm_next_seq
 
 
-def test_flush_pending_on_run_exit_emits_error_events(
-    crewai_module_with_mocked_hooks, temp_data_dir
+def test_after_tool_matches_oldest_pending_call_for_same_tool(
+    crewai_module, temp_data_dir, mocker
 ):
-    """On run exit (no exception), pending LLM/tool entries get events with status=error and meta.crewai.completion=missing_after_hook."""
-    crewai = crewai_module_with_mocked_hooks
-    run_id = "flush-run"
-    crewai._pending_llm[run_id] = {
-        (0, 0, 0): {
-            "start_ts": 0.0,
-            "messages": [{"role": "user", "content": "x"}],
-            "model": "gpt-4",
-            "meta": {"framework": "crewai"},
-        }
-    }
-    crewai._pending_tool[run_id] = {
-        ("my_tool", 0): {
-            "start_ts": 0.0,
-            "tool_input": {"q": 1},
-            "meta": {"framework": "crewai"},
-        }
-    }
-    with patch.object(crewai, "record_llm_call", MagicMock()) as record_llm:
-        with patch.object(crewai, "record_tool_call", MagicMock()) as record_tool:
-            crewai._flush_pending_for_run(run_id, None, None, None)
-    record_llm.assert_called_once()
-    record_tool.assert_called_once()
-    llm_kw = record_llm.call_args.kwargs
-    tool_kw = record_tool.call_args.kwargs
-    assert llm_kw.get("status") == "error"
-    assert tool_kw.get("status") == "error"
-    assert (llm_kw.get("meta") or {}).get("crewai", {}).get(
-        "completion"
-    ) == "missing_after_hook"
-    assert (tool_kw.get("meta") or {}).get("crewai", {}).get(
-        "completion"
-    ) == "missing_after_hook"
-    assert run_id not in crewai._pending_llm
-    assert run_id not in crewai._pending_tool
-
-
-def test_flush_pending_with_exception_attaches_error_payload(
-    crewai_module_with_mocked_hooks, temp_data_dir
+    """Two overlapping calls to the same tool are matched FIFO by their after-hooks."""
+    crewai = crewai_module
+    run_id = "fifo-run"
+    first = make_fake_tool_context(tool_name="search", tool_input={"q": "first"})
+    second = make_fake_tool_context(tool_name="search", tool_input={"q": "second"})
+    mocker.patch.object(crewai, "_get_active_run_id", return_value=run_id)
+    record = mocker.patch.object(crewai, "record_tool_call")
+    crewai._before_tool_call(first)
+    crewai._before_tool_call(second)
+    crewai._after_tool_call(second)
+    crewai._after_tool_call(second)
+    assert [c.kwargs["args"] for c in record.call_args_list] == [
+        {"q": "first"},
+        {"q": "second"},
+    ]
+    assert not crewai._pending_tool[run_id]
+
+
+def test_snapshot_messages_copies_mutable_and_keeps_immutable(
+    crewai_module,
 ):
-    """When run exits with exception, flushed pending events get exception in error payload (error_type, message, stack)."""
-    crewai = crewai_module_with_mocked_hooks
-    run_id = "exc-run"
-    crewai._pending_llm[run_id] = {
-        (0, 0, 0): {
-            "start_ts": 0.0,
-            "messages": [],
-            "model": "unknown",
-            "meta": {},
-        }
+    """List/dict messages are copied (later mutation not seen); a tuple of strings is reused."""
+    crewai = crewai_module
+    messages = [{"role": "user", "content": "hi"}]
+    snap = crewai._snapshot_messages(messages)
+    messages[0]["content"] = "changed"
+    messages.append({"role": "assistant", "content": "later"})
+    assert snap == [{"role": "user", "content": "hi"}]
+
+    frozen = ("system prompt", "user prompt")
+    assert crewai._snapshot_messages(frozen) is frozen
+
+
+def test_crewai_meta_builders_extract_context_fields(crewai_module):
+    """LLM meta carries executor/crew ids, iterations, role and task; tool meta carries role and task."""
+    crewai = crewai_module
+    executor, crew = SimpleNamespace(), SimpleNamespace()
+    llm_ctx = make_fake_llm_context(executor=executor, crew=crew, iterations=2)
+    assert crewai._crewai_meta_llm(llm_ctx) == {
+        "framework": "crewai",
+        "agent_role": "Researcher",
+        "task_desc": "Do research",
+        "crewai": {
+            "executor_id": id(executor),
+            "iterations": 2,
+            "crew_id": id(crew),
+        },
     }
-    try:
-        raise ValueError("run failed")
-    except ValueError:
-        import sys
-
-        exc_type, exc_value, tb = sys.exc_info()
-    with patch.object(crewai, "record_llm_call", MagicMock()) as record_llm:
-        crewai._flush_pending_for_run(run_id, exc_type, exc_value, tb)
-    record_llm.assert_called_once()
-    call_kw = record_llm.call_args.kwargs
-    assert call_kw.get("status") == "error"
-    assert call_kw.get("error") is not None
-    assert call_kw["error"].get("error_type") == "ValueError"
-    assert "run failed" in str(call_kw["error"].get("message", ""))
-    assert (
-        call_kw["error"].get("stack") is not None
-        and "ValueError" in call_kw["error"]["stack"]
-    )
+    assert crewai._crewai_meta_tool(make_fake_tool_context(agent_role="")) == {
+        "framework": "crewai",
+        "task_desc": "Do research",
+    }
+    assert crewai._crewai_meta_llm(SimpleNamespace()) == {"framework": "crewai"}
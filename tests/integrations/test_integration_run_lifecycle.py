@@ -16,7 +16,6 @@ from maida._integration_utils import (
 from maida.config import load_config
 from maida.events import EventType
 from maida.storage import load_events
-from tests.conftest import get_latest_run_id
 
 
 @pytest.fixture(autouse=True)
@@ -88,7 +87,9 @@ def test_exit_receives_none_when_run_succeeds(temp_data_dir):
     assert exit_info[0] == (None, None, None)
 
 
-def test_run_exit_callback_event_before_run_end_and_exc_when_raises(temp_data_dir):
+def test_run_exit_callback_event_before_run_end_and_exc_when_raises(
+    temp_data_dir, started_run_ids
+):
     """run_exit callback that records an event: event is written before RUN_END; exc_type is set when run raises."""
     exit_exc_type = []
 
@@ -101,14 +102,14 @@ def test_run_exit_callback_event_before_run_end_and_exc_when_raises(temp_data_di
     register_run_exit(on_exit)
 
     with pytest.raises(ValueError, match="run failed"):
-        with traced_run(name="failing"):
+        with traced_run(name="failing_with_exit_event"):
             raise ValueError("run failed")
 
     assert len(exit_exc_type) == 1 and exit_exc_type[0] is not None
     assert exit_exc_type[0] is ValueError
 
     config = load_config()
-    run_id = get_latest_run_id(config)
+    run_id = started_run_ids[-1]
     events = load_events(run_id, config)
     run_end_indices = [
         i
@@ -7,7 +7,6 @@ import logging
 import sys
 
 import pytest
-from tests.conftest import get_latest_run_id
 
 from maida import trace
 from maida.config import load_config
@@ -109,12 +108,12 @@ def _traced_with_handler():
 
 
 @pytest.mark.skipif(LANGCHAIN_MISSING, reason="langchain_core not installed")
-def test_langchain_handler_emits_tool_call_and_llm_call(temp_data_dir):
+def test_langchain_handler_emits_tool_call_and_llm_call(temp_data_dir, started_run_ids):
     """With langchain installed, traced run with handler produces TOOL_CALL and LLM_CALL."""
     _traced_with_handler()
 
     config = load_config()
-    run_id = get_latest_run_id(config)
+    run_id = started_run_ids[-1]
     events = load_events(run_id, config)
 
     tool_events = [
@@ -136,7 +135,9 @@ def test_langchain_handler_emits_tool_call_and_llm_call(temp_data_dir):
 
 
 @pytest.mark.skipif(LANGCHAIN_MISSING, reason="langchain_core not installed")
-def test_langchain_handler_tool_error_emits_error_status(temp_data_dir):
+def test_langchain_handler_tool_error_emits_error_status(
+    temp_data_dir, started_run_ids
+):
     """Simulate tool error callback; record_tool_call is called with status=error."""
     handler = LangChainCallbackHandler()
 
@@ -155,7 +156,7 @@ def test_langchain_handler_tool_error_emits_error_status(temp_data_dir):
     _run()
 
     config = load_config()
-    run_id = get_latest_run_id(config)
+    run_id = started_run_ids[-1]
     events = load_events(run_id, config)
     error_tools = [
         e
@@ -184,7 +185,9 @@ def _simulate_langchain_handle_event(handler, event_name: str, *args, **kwargs)
 
 
 @pytest.mark.skipif(LANGCHAIN_MISSING, reason="langchain_core not installed")
-def test_langchain_handler_guardrail_propagates_via_raise_error(temp_data_dir):
+def test_langchain_handler_guardrail_propagates_via_raise_error(
+    temp_data_dir, started_run_ids
+):
     """stop_on_loop guardrail sets raise_error=True so LangChain propagates the abort."""
     handler = LangChainCallbackHandler()
     assert handler.raise_error is False, "raise_error should default to False"
@@ -234,7 +237,7 @@ def test_langchain_handler_guardrail_propagates_via_raise_error(temp_data_dir):
     assert isinstance(handler.abort_exception, GuardrailExceeded)
 
     config = load_config()
-    run_id = get_latest_run_id(config)
+    run_id = started_run_ids[-1]
     events = load_events(run_id, config)
 
     event_types = [e.get("event_type") for e in events]
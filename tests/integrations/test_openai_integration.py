@@ -13,14 +13,12 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
+# Load the tracing stack before any patch.dict(sys.modules) below, so those
+# blocks never drop it and later imports keep sharing one run context.
+import maida.tracing  # noqa: F401
 from maida.integrations._error import MissingOptionalDependencyError
 
 
-def _drop_openai_agents_integration_modules() -> None:
-    sys.modules.pop("maida.integrations.openai_agents", None)
-    sys.modules.pop("maida.integrations", None)
-
-
 def _make_fake_agents_modules() -> dict[str, ModuleType]:
     agents_module = ModuleType("agents")
     agents_module.__path__ = []  # type: ignore[attr-defined]
@@ -117,10 +115,10 @@ def _fake_span(span_data, *, error=None, parent_id=None):
 
 
 @pytest.fixture(autouse=True)
-def clear_openai_integration_imports():
-    _drop_openai_agents_integration_modules()
-    yield
-    _drop_openai_agents_integration_modules()
+def clear_openai_integration_imports(monkeypatch):
+    """Re-import the integration per test; the original modules are put back afterwards."""
+    monkeypatch.delitem(sys.modules, "maida.integrations.openai_agents", raising=False)
+    monkeypatch.delitem(sys.modules, "maida.integrations", raising=False)
 
 
 @pytest.fixture
@@ -377,7 +375,7 @@ def test_abort_exception_resets_on_new_trace(openai_agents_module):
 
 
 def test_loop_warning_dedup_with_openai_agents_adapter(
-    openai_agents_module, temp_data_dir
+    openai_agents_module, temp_data_dir, started_run_ids
 ):
     """When stop_on_loop fires inside the OpenAI Agents adapter, the
     _MaidaAbortSignal (BaseException) bypasses the SDK's except Exception
@@ -389,7 +387,6 @@ def test_loop_warning_dedup_with_openai_agents_adapter(
     from maida.events import EventType
     from maida.exceptions import LoopAbort
     from maida.storage import load_events, load_run_meta
-    from tests.conftest import get_latest_run_id
 
     processor = openai_agents.PROCESSOR
 
@@ -438,7 +435,7 @@ def test_loop_warning_dedup_with_openai_agents_adapter(
     )
 
     config = load_config()
-    run_id = get_latest_run_id(config)
+    run_id = started_run_ids[-1]
     events = load_events(run_id, config)
     run_meta = load_run_meta(run_id, config)
 
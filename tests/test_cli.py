@@ -41,9 +41,10 @@ def _make_run(config, *, name="test_run", events=None, status="ok"):
 
 
 @pytest.fixture
-def empty_data_dir(temp_data_dir):
-    """Empty data dir with MAIDA_DATA_DIR set (env restored after test)."""
-    return temp_data_dir
+def empty_data_dir(tmp_path, monkeypatch):
+    """Empty per-test data dir with MAIDA_DATA_DIR set (unlike the module-shared temp_data_dir)."""
+    monkeypatch.setenv("MAIDA_DATA_DIR", str(tmp_path))
+    return tmp_path
 
 
 def test_list_empty_dir_exit_zero(empty_data_dir):
@@ -104,11 +105,9 @@ def test_export_success_path_writes_run_and_events(empty_data_dir):
     from maida.config import load_config
     from maida.events import EventType, new_event
     from maida.storage import append_event, create_run
-    from tests.conftest import get_latest_run_id
 
     config = load_config()
-    create_run("export_success_run", config)
-    run_id = get_latest_run_id(config)
+    run_id = create_run("export_success_run", config)["run_id"]
     ev = new_event(
         EventType.TOOL_CALL, run_id, "test_tool", {"tool_name": "test_tool", "args": {}}
     )
@@ -140,11 +139,9 @@ def test_list_with_actual_runs_shows_runs(empty_data_dir):
     """maida list with real runs shows run_id/run_name in text output and in --json runs."""
     from maida.config import load_config
     from maida.storage import create_run
-    from tests.conftest import get_latest_run_id
 
     config = load_config()
-    create_run("list_me_run", config)
-    run_id = get_latest_run_id(config)
+    run_id = create_run("list_me_run", config)["run_id"]
 
     result = runner.invoke(app, ["list"])
     assert result.exit_code == 0
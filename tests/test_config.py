@@ -18,6 +18,7 @@ _ENV_KEYS = [
     "MAIDA_LOOP_WINDOW",
     "MAIDA_LOOP_REPETITIONS",
     "MAIDA_DATA_DIR",
+    "MAIDA_STORAGE",
     "MAIDA_STOP_ON_LOOP",
     "MAIDA_STOP_ON_LOOP_MIN_REPETITIONS",
     "MAIDA_MAX_LLM_CALLS",
@@ -136,3 +137,106 @@ def test_yaml_redact_off_disables_redaction(tmp_path, monkeypatch):
     # api_key must NOT be redacted because redact is off.
     assert result["api_key"] == "sk-secret-1234"
     assert result["data"] == "hello"
+
+
+# ------------------------------------------------------------------
+# 5. get_config caches until config files or env change
+# ------------------------------------------------------------------
+
+
+def test_get_config_reuses_result_until_inputs_change(tmp_path, monkeypatch):
+    """get_config returns the cached object until YAML or MAIDA_* env changes."""
+    fake_home = tmp_path / "fakehome"
+    fake_home.mkdir()
+    monkeypatch.setattr(Path, "home", staticmethod(lambda: fake_home))
+
+    from maida.config import get_config
+
+    first = get_config(project_root=tmp_path)
+    assert get_config(project_root=tmp_path) is first
+    assert first.max_field_bytes == 20_000
+
+    _write_yaml(tmp_path, "max_field_bytes: 123\n")
+    from_yaml = get_config(project_root=tmp_path)
+    assert from_yaml is not first
+    assert from_yaml.max_field_bytes == 123
+
+    monkeypatch.setenv("MAIDA_MAX_FIELD_BYTES", "456")
+    from_env = get_config(project_root=tmp_path)
+    assert from_env.max_field_bytes == 456
+    assert get_config(project_root=tmp_path) is from_env
+
+
+# ------------------------------------------------------------------
+# 6. Layering: user YAML < project YAML < env, invalid values ignored
+# ------------------------------------------------------------------
+
+
+def test_user_project_env_layering_and_invalid_values(tmp_path, monkeypatch):
+    """Each layer overrides only the keys it sets; invalid values keep the lower layer."""
+    fake_home = tmp_path / "fakehome"
+    _write_yaml(
+        fake_home,
+        "redact_keys: [foo]\nloop_window: 9\nmax_field_bytes: 500\n"
+        "guardrails:\n  max_llm_calls: 5\n",
+    )
+    _write_yaml(tmp_path, "loop_window: 8\nmax_field_bytes: not-a-number\n")
+    monkeypatch.setattr(Path, "home", staticmethod(lambda: fake_home))
+    monkeypatch.setenv("MAIDA_LOOP_REPETITIONS", "oops")
+    monkeypatch.setenv("MAIDA_MAX_TOOL_CALLS", "7")
+    monkeypatch.setenv("MAIDA_STOP_ON_LOOP", "yes")
+
+    from maida.config import load_config
+
+    cfg = load_config(project_root=tmp_path)
+
+    assert cfg.redact_keys == ["foo"]
+    assert cfg.loop_window == 8
+    assert cfg.max_field_bytes == 500
+    assert cfg.loop_repetitions == 3
+    assert cfg.guardrails.max_llm_calls == 5
+    assert cfg.guardrails.max_tool_calls == 7
+    assert cfg.guardrails.stop_on_loop is True
+
+
+# ------------------------------------------------------------------
+# 7. YAML files are parsed once per (path, mtime, size)
+# ------------------------------------------------------------------
+
+
+def test_load_yaml_reuses_parse_until_file_changes(tmp_path):
+    """_load_yaml returns the cached parse for an unchanged file and re-reads on edit."""
+    from maida.config import _load_yaml
+
+    cfg_file = _write_yaml(tmp_path, "loop_window: 7\n")
+    first = _load_yaml(cfg_file)
+    assert first == {"loop_window": 7}
+    assert _load_yaml(cfg_file) is first
+
+    cfg_file.write_text("loop_window: 10\nredact: false\n", encoding="utf-8")
+    assert _load_yaml(cfg_file) == {"loop_window": 10, "redact": False}
+
+    cfg_file.unlink()
+    assert _load_yaml(cfg_file) == {}
+    assert _load_yaml(tmp_path) == {}
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("1", True),
+        (" TRUE ", True),
+        ("yes", True),
+        ("On", True),
+        ("0", False),
+        ("", False),
+    ],
+)
+def test_env_bool_flags(tmp_path, monkeypatch, raw, expected):
+    """MAIDA_REDACT accepts 1/true/yes/on (any case, stripped); anything else disables."""
+    monkeypatch.setattr(Path, "home", staticmethod(lambda: tmp_path / "fakehome"))
+    monkeypatch.setenv("MAIDA_REDACT", raw)
+
+    from maida.config import load_config
+
+    assert load_config(project_root=tmp_path).redact is expected
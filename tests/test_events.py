@@ -1,35 +1,51 @@
-"""Tests for event helpers: JSON-safety and depth limit (consistent with redaction)."""
+"""Tests for event helpers and constants: JSON-safety, depth limit (consistent with redaction), default counts."""
 
-from maida.constants import DEPTH_LIMIT, TRUNCATED_MARKER
+import pytest
+
+from maida import events
+from maida.constants import DEPTH_LIMIT, TRUNCATED_MARKER, default_counts
 from maida.events import _ensure_json_safe
 
+# Small stand-in for the depth limit so nesting and traversal stay cheap.
+_TEST_DEPTH_LIMIT = 4
+
+
+def test_json_safe_depth_limit_matches_redaction():
+    """_json_safe_value uses the same depth limit as _redact_and_truncate."""
+    assert events._MAX_JSON_DEPTH == DEPTH_LIMIT
 
-def test_json_safe_value_depth_exceeded_returns_truncated_marker():
-    """When depth is exceeded, _json_safe_value returns TRUNCATED_MARKER (consistent with _redact_and_truncate)."""
-    # Nest deeper than DEPTH_LIMIT so the inner value is at depth > DEPTH_LIMIT
-    deep = "leaf"
-    for _ in range(DEPTH_LIMIT + 1):
+
+@pytest.mark.parametrize(
+    ("over", "expected"),
+    [(0, "ok"), (1, TRUNCATED_MARKER)],
+    ids=["at_limit", "over_limit"],
+)
+def test_json_safe_depth(monkeypatch, over, expected):
+    """
+    At exactly the depth limit the value is kept; one level beyond it becomes
+    TRUNCATED_MARKER (consistent with _redact_and_truncate).
+    """
+    monkeypatch.setattr(events, "_MAX_JSON_DEPTH", _TEST_DEPTH_LIMIT)
+    levels = _TEST_DEPTH_LIMIT + over
+    deep = "ok"
+    for _ in range(levels):
         deep = [deep]
-    result = _ensure_json_safe(deep)
-    # Navigate to the innermost element
-    inner = result
-    for _ in range(DEPTH_LIMIT + 1):
+    inner = _ensure_json_safe(deep)
+    for _ in range(levels):
         assert isinstance(inner, list)
         assert len(inner) == 1
         inner = inner[0]
-    assert inner == TRUNCATED_MARKER
-
-
-def test_json_safe_value_at_limit_preserves_value():
-    """At exactly DEPTH_LIMIT depth we still recurse; only beyond it we substitute TRUNCATED_MARKER."""
-    # Nest exactly DEPTH_LIMIT levels of lists, with a string at the bottom
-    inner = "ok"
-    for _ in range(DEPTH_LIMIT):
-        inner = [inner]
-    result = _ensure_json_safe(inner)
-    current = result
-    for _ in range(DEPTH_LIMIT):
-        assert isinstance(current, list)
-        assert len(current) == 1
-        current = current[0]
-    assert current == "ok"
+    assert inner == expected
+
+
+def test_default_counts_returns_independent_zeroed_dicts():
+    """default_counts() returns a fresh mutable dict each call; mutating one does not leak."""
+    first = default_counts()
+    first["llm_calls"] += 1
+    assert default_counts() == {
+        "llm_calls": 0,
+        "tool_calls": 0,
+        "errors": 0,
+        "loop_warnings": 0,
+    }
+    assert type(default_counts()) is dict
@@ -5,14 +5,15 @@ Deterministic: no network, no randomness. Uses temp_data_dir; max_duration_s tes
 use patched time.
 """
 
+from collections import Counter
+
 import pytest
 
 from maida import record_llm_call, record_tool_call, record_state, trace, traced_run
 from maida.config import load_config
 from maida.events import EventType
 from maida.exceptions import GuardrailExceeded, LoopAbort
-from maida.storage import load_events, load_run_meta
-from tests.conftest import get_latest_run_id
+from maida.storage import load_event_types, load_events, load_run_meta
 
 
 # ---------------------------------------------------------------------------
@@ -28,20 +29,21 @@ def _run_loop_pattern():
         record_llm_call("gpt", prompt="p", response="r")
 
 
-def test_stop_on_loop_enabled_and_threshold_crossed_aborts(temp_data_dir):
+def test_stop_on_loop_enabled_and_threshold_crossed_aborts(
+    temp_data_dir, started_run_ids
+):
     """When stop_on_loop=True and loop detection fires with repetitions >= threshold, abort."""
     with pytest.raises(LoopAbort):
         _run_loop_pattern()
 
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
+    run_id = started_run_ids[-1]
     run_meta = load_run_meta(run_id, config)
 
-    errors = [e for e in events if e.get("event_type") == EventType.ERROR.value]
-    run_ends = [e for e in events if e.get("event_type") == EventType.RUN_END.value]
-    assert len(errors) == 1
-    assert len(run_ends) == 1
+    counts = Counter(load_event_types(run_id, config))
+    errors = load_events(run_id, config, types={EventType.ERROR.value})
+    assert counts[EventType.ERROR.value] == 1
+    assert counts[EventType.RUN_END.value] == 1
     assert run_meta.get("status") == "error"
     payload = errors[0].get("payload", {})
     assert payload.get("guardrail") == "stop_on_loop"
@@ -56,25 +58,21 @@ def _run_loop_pattern_no_stop():
         record_llm_call("y", prompt="p", response="r")
 
 
-def test_stop_on_loop_disabled_no_abort(temp_data_dir):
+def test_stop_on_loop_disabled_no_abort(temp_data_dir, started_run_ids):
     """When stop_on_loop=False, loop warning is emitted but no abort."""
     _run_loop_pattern_no_stop()
 
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
+    run_id = started_run_ids[-1]
     run_meta = load_run_meta(run_id, config)
 
-    loop_warnings = [
-        e for e in events if e.get("event_type") == EventType.LOOP_WARNING.value
-    ]
-    errors = [e for e in events if e.get("event_type") == EventType.ERROR.value]
-    assert len(loop_warnings) == 1
-    assert len(errors) == 0
+    counts = Counter(load_event_types(run_id, config))
+    assert counts[EventType.LOOP_WARNING.value] == 1
+    assert counts[EventType.ERROR.value] == 0
     assert run_meta.get("status") == "ok"
 
 
-def test_stop_on_loop_below_threshold_no_abort(temp_data_dir):
+def test_stop_on_loop_below_threshold_no_abort(temp_data_dir, started_run_ids):
     """When repetitions (2) < stop_on_loop_min_repetitions (3), no abort."""
 
     @trace(stop_on_loop=True, stop_on_loop_min_repetitions=3)
@@ -87,12 +85,11 @@ def test_stop_on_loop_below_threshold_no_abort(temp_data_dir):
     run_two()
 
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
+    run_id = started_run_ids[-1]
     run_meta = load_run_meta(run_id, config)
 
-    errors = [e for e in events if e.get("event_type") == EventType.ERROR.value]
-    assert len(errors) == 0
+    counts = Counter(load_event_types(run_id, config))
+    assert counts[EventType.ERROR.value] == 0
     assert run_meta.get("status") == "ok"
 
 
@@ -101,7 +98,7 @@ def test_stop_on_loop_below_threshold_no_abort(temp_data_dir):
 # ---------------------------------------------------------------------------
 
 
-def test_max_llm_calls_triggers_at_n_plus_one(temp_data_dir):
+def test_max_llm_calls_triggers_at_n_plus_one(temp_data_dir, started_run_ids):
     """max_llm_calls=50 allows 50 calls; 51st triggers abort."""
 
     @trace(max_llm_calls=2)
@@ -118,16 +115,16 @@ def test_max_llm_calls_triggers_at_n_plus_one(temp_data_dir):
     assert exc_info.value.actual == 3
 
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
+    run_id = started_run_ids[-1]
     run_meta = load_run_meta(run_id, config)
-    errors = [e for e in events if e.get("event_type") == EventType.ERROR.value]
-    assert len(errors) == 1
+    counts = Counter(load_event_types(run_id, config))
+    errors = load_events(run_id, config, types={EventType.ERROR.value})
+    assert counts[EventType.ERROR.value] == 1
     assert errors[0]["payload"]["guardrail"] == "max_llm_calls"
     assert run_meta.get("status") == "error"
 
 
-def test_max_llm_calls_at_limit_does_not_trigger(temp_data_dir):
+def test_max_llm_calls_at_limit_does_not_trigger(temp_data_dir, started_run_ids):
     """Exactly 2 LLM calls when max_llm_calls=2 completes ok."""
 
     @trace(max_llm_calls=2)
@@ -138,7 +135,7 @@ def test_max_llm_calls_at_limit_does_not_trigger(temp_data_dir):
     run_two_llm()
 
     config = load_config()
-    run_id = get_latest_run_id(config)
+    run_id = started_run_ids[-1]
     run_meta = load_run_meta(run_id, config)
     assert run_meta.get("status") == "ok"
     assert run_meta.get("counts", {}).get("llm_calls") == 2
@@ -220,7 +217,7 @@ def test_max_duration_s_triggers_after_timeout(temp_data_dir, monkeypatch):
 # ---------------------------------------------------------------------------
 
 
-def test_guardrail_abort_records_error_and_run_end(temp_data_dir):
+def test_guardrail_abort_records_error_and_run_end(temp_data_dir, started_run_ids):
     """Guardrail abort produces exactly one ERROR and RUN_END(status=error)."""
 
     @trace(max_llm_calls=0)
@@ -231,14 +228,13 @@ def test_guardrail_abort_records_error_and_run_end(temp_data_dir):
         run_one_llm()
 
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
+    run_id = started_run_ids[-1]
     run_meta = load_run_meta(run_id, config)
 
-    errors = [e for e in events if e.get("event_type") == EventType.ERROR.value]
-    run_ends = [e for e in events if e.get("event_type") == EventType.RUN_END.value]
-    assert len(errors) == 1
-    assert len(run_ends) == 1
+    counts = Counter(load_event_types(run_id, config))
+    run_ends = load_events(run_id, config, types={EventType.RUN_END.value})
+    assert counts[EventType.ERROR.value] == 1
+    assert counts[EventType.RUN_END.value] == 1
     assert run_ends[0].get("payload", {}).get("status") == "error"
     assert run_meta.get("status") == "error"
     assert run_meta.get("counts", {}).get("errors") == 1
@@ -273,20 +269,19 @@ def _traced_no_guardrails():
         record_tool_call("t", args={}, result=None)
 
 
-def test_default_behavior_unchanged(temp_data_dir):
+def test_default_behavior_unchanged(temp_data_dir, started_run_ids):
     """With no guardrail params (defaults), run completes normally."""
     _traced_no_guardrails()
 
     config = load_config()
-    run_id = get_latest_run_id(config)
+    run_id = started_run_ids[-1]
     run_meta = load_run_meta(run_id, config)
-    events = load_events(run_id, config)
 
     assert run_meta.get("status") == "ok"
     assert run_meta.get("counts", {}).get("llm_calls") == 4
     assert run_meta.get("counts", {}).get("tool_calls") == 4
-    errors = [e for e in events if e.get("event_type") == EventType.ERROR.value]
-    assert len(errors) == 0
+    counts = Counter(load_event_types(run_id, config))
+    assert counts[EventType.ERROR.value] == 0
 
 
 # ---------------------------------------------------------------------------
@@ -315,15 +310,15 @@ def test_precedence_function_arg_over_env(temp_data_dir, monkeypatch):
 # ---------------------------------------------------------------------------
 
 
-def test_traced_run_with_guardrails(temp_data_dir):
+def test_traced_run_with_guardrails(temp_data_dir, started_run_ids):
     """traced_run(max_llm_calls=N) enforces limit."""
     with pytest.raises(GuardrailExceeded):
-        with traced_run(max_llm_calls=1):
+        with traced_run(name="traced-run-max-llm-calls", max_llm_calls=1):
             record_llm_call("a", prompt="p", response="r")
             record_llm_call("b", prompt="p", response="r")
 
     config = load_config()
-    run_id = get_latest_run_id(config)
+    run_id = started_run_ids[-1]
     run_meta = load_run_meta(run_id, config)
     assert run_meta.get("status") == "error"
 
@@ -415,7 +410,9 @@ def test_max_duration_s_zero_triggers_immediately(temp_data_dir, monkeypatch):
 # ---------------------------------------------------------------------------
 
 
-def test_loop_warning_dedup_no_guardrail_emits_one_per_pattern(temp_data_dir):
+def test_loop_warning_dedup_no_guardrail_emits_one_per_pattern(
+    temp_data_dir, started_run_ids
+):
     """With stop_on_loop=False, a long repeated sequence emits exactly one
     LOOP_WARNING per distinct pattern, not one per detection opportunity."""
 
@@ -428,13 +425,10 @@ def test_loop_warning_dedup_no_guardrail_emits_one_per_pattern(temp_data_dir):
     run_long_loop()
 
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
+    run_id = started_run_ids[-1]
     run_meta = load_run_meta(run_id, config)
 
-    loop_warnings = [
-        e for e in events if e.get("event_type") == EventType.LOOP_WARNING.value
-    ]
+    loop_warnings = load_events(run_id, config, types={EventType.LOOP_WARNING.value})
     patterns = {e["payload"]["pattern"] for e in loop_warnings}
     assert len(patterns) <= 2, f"at most 2 distinct patterns, got {patterns}"
     assert len(loop_warnings) == len(patterns), (
@@ -445,7 +439,9 @@ def test_loop_warning_dedup_no_guardrail_emits_one_per_pattern(temp_data_dir):
     assert run_meta["status"] == "ok"
 
 
-def test_loop_warning_dedup_with_stop_on_loop_emits_minimal_warnings(temp_data_dir):
+def test_loop_warning_dedup_with_stop_on_loop_emits_minimal_warnings(
+    temp_data_dir, started_run_ids
+):
     """With stop_on_loop=True, the first qualifying LOOP_WARNING triggers
     LoopAbort.  Even if the caller catches the exception and keeps
     emitting events (simulating the OpenAI Agents SDK behaviour), subsequent
@@ -470,13 +466,10 @@ def test_loop_warning_dedup_with_stop_on_loop_emits_minimal_warnings(temp_data_d
     run_loop_swallowing_abort()
 
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
+    run_id = started_run_ids[-1]
     run_meta = load_run_meta(run_id, config)
 
-    loop_warnings = [
-        e for e in events if e.get("event_type") == EventType.LOOP_WARNING.value
-    ]
+    loop_warnings = load_events(run_id, config, types={EventType.LOOP_WARNING.value})
     patterns = {e["payload"]["pattern"] for e in loop_warnings}
     assert len(loop_warnings) == len(patterns), (
         f"each pattern should produce exactly one LOOP_WARNING, "
@@ -486,7 +479,7 @@ def test_loop_warning_dedup_with_stop_on_loop_emits_minimal_warnings(temp_data_d
     assert run_meta["counts"]["loop_warnings"] == len(loop_warnings)
 
 
-def test_stop_on_loop_re_raises_after_swallowed_abort(temp_data_dir):
+def test_stop_on_loop_re_raises_after_swallowed_abort(temp_data_dir, started_run_ids):
     """When stop_on_loop=True and the framework swallows LoopAbort,
     subsequent detections of the same pattern must keep raising the abort
     (without emitting duplicate LOOP_WARNING events)."""
@@ -518,12 +511,9 @@ def test_stop_on_loop_re_raises_after_swallowed_abort(temp_data_dir):
     )
 
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
+    run_id = started_run_ids[-1]
 
-    loop_warnings = [
-        e for e in events if e.get("event_type") == EventType.LOOP_WARNING.value
-    ]
+    loop_warnings = load_events(run_id, config, types={EventType.LOOP_WARNING.value})
     patterns = {e["payload"]["pattern"] for e in loop_warnings}
     assert len(loop_warnings) == len(patterns), (
         "dedup must still prevent duplicate LOOP_WARNING events"
@@ -535,7 +525,7 @@ def test_stop_on_loop_re_raises_after_swallowed_abort(temp_data_dir):
 # ---------------------------------------------------------------------------
 
 
-def test_nested_traced_run_applies_guardrail_params(temp_data_dir):
+def test_nested_traced_run_applies_guardrail_params(temp_data_dir, started_run_ids):
     """traced_run(stop_on_loop=True) inside @trace (which defaults to
     stop_on_loop=False) must apply the inner guardrail params."""
 
@@ -550,12 +540,9 @@ def test_nested_traced_run_applies_guardrail_params(temp_data_dir):
         run_outer()
 
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
+    run_id = started_run_ids[-1]
 
-    loop_warnings = [
-        e for e in events if e.get("event_type") == EventType.LOOP_WARNING.value
-    ]
-    assert len(loop_warnings) >= 1, (
+    counts = Counter(load_event_types(run_id, config))
+    assert counts[EventType.LOOP_WARNING.value] >= 1, (
         "nested traced_run with stop_on_loop=True should emit LOOP_WARNING"
     )
@@ -1,9 +1,10 @@
 """
 Tests for redaction: sensitive keys in payloads are replaced with __REDACTED__.
-Uses MAIDA_REDACT_KEYS and temp dir via MAIDA_DATA_DIR.
+Sets MAIDA_REDACT_KEYS via monkeypatch. Payload-shape tests use in-memory storage;
+tests that inspect events.jsonl bytes use a temp dir via MAIDA_DATA_DIR.
 """
 
-import os
+from collections import Counter
 from unittest.mock import patch
 
 import pytest
@@ -14,9 +15,9 @@ from maida.constants import REDACTED_MARKER, TRUNCATED_MARKER
 from maida.config import load_config, MaidaConfig
 from maida.guardrails import GuardrailParams
 from maida.events import EventType
-from maida._tracing._redact import _redact_and_truncate
+from maida._tracing._redact import _redact_and_truncate, _redact_keys_pattern
 from maida.tracing import record_tool_call, trace, traced_run
-from maida.storage import load_events, list_runs
+from maida.storage import load_event_types, load_events
 
 
 def test_redaction_constants_unchanged():
@@ -54,36 +55,20 @@ def test_max_field_truncation():
     assert out["other"] == "short"
 
 
-@pytest.fixture
-def redact_token_env():
-    """Set MAIDA_REDACT_KEYS=token for the test."""
-    old = os.environ.get("MAIDA_REDACT_KEYS")
-    try:
-        os.environ["MAIDA_REDACT_KEYS"] = "token"
-        yield
-    finally:
-        if old is not None:
-            os.environ["MAIDA_REDACT_KEYS"] = old
-        elif "MAIDA_REDACT_KEYS" in os.environ:
-            os.environ.pop("MAIDA_REDACT_KEYS")
-
-
-@pytest.fixture
-def redact_message_and_stack_env():
-    """Set MAIDA_REDACT_KEYS=message,stack so ERROR payload message/stack are redacted."""
-    old = os.environ.get("MAIDA_REDACT_KEYS")
-    try:
-        os.environ["MAIDA_REDACT_KEYS"] = "message,stack"
-        yield
-    finally:
-        if old is not None:
-            os.environ["MAIDA_REDACT_KEYS"] = old
-        elif "MAIDA_REDACT_KEYS" in os.environ:
-            os.environ.pop("MAIDA_REDACT_KEYS")
-
-
-def test_record_tool_call_redacts_args_with_token_key(temp_data_dir, redact_token_env):
+def _only_run_events(run_ids: list[str], event_type: EventType) -> list[dict]:
+    """Events of event_type from the test's one run, which must hold exactly one such event."""
+    assert len(run_ids) == 1
+    config = load_config()
+    counts = Counter(load_event_types(run_ids[0], config))
+    assert counts[event_type.value] == 1
+    return load_events(run_ids[0], config, types={event_type.value})
+
+
+def test_record_tool_call_redacts_args_with_token_key(
+    memory_storage, monkeypatch, started_run_ids
+):
     """record_tool_call with args containing 'token' key -> value is __REDACTED__."""
+    monkeypatch.setenv("MAIDA_REDACT_KEYS", "token")
 
     @trace
     def run_with_tool():
@@ -91,16 +76,7 @@ def test_record_tool_call_redacts_args_with_token_key(temp_data_dir, redact_toke
 
     run_with_tool()
 
-    config = load_config()
-    runs = list_runs(limit=1, config=config)
-    assert runs
-    run_id = runs[0]["run_id"]
-    events = load_events(run_id, config)
-
-    tool_events = [
-        e for e in events if e.get("event_type") == EventType.TOOL_CALL.value
-    ]
-    assert len(tool_events) == 1
+    tool_events = _only_run_events(started_run_ids, EventType.TOOL_CALL)
     payload = tool_events[0]["payload"]
     args = payload.get("args")
     assert isinstance(args, dict)
@@ -108,54 +84,43 @@ def test_record_tool_call_redacts_args_with_token_key(temp_data_dir, redact_toke
     assert args.get("query") == "hello"
 
 
-def test_error_event_payload_redacted_decorator(
-    temp_data_dir, redact_message_and_stack_env
-):
-    """ERROR from @trace has message and stack redacted when redact_keys include message,stack."""
+def _raise_in_trace_decorator(message: str) -> None:
+    """Raise ValueError(message) inside a @trace-decorated function."""
 
     @trace
     def run_that_raises():
-        raise ValueError("API key sk-abc123 is invalid")
+        raise ValueError(message)
 
-    with pytest.raises(ValueError, match="API key sk-abc123 is invalid"):
-        run_that_raises()
+    run_that_raises()
 
-    config = load_config()
-    runs = list_runs(limit=1, config=config)
-    assert runs
-    run_id = runs[0]["run_id"]
-    events = load_events(run_id, config)
 
-    error_events = [e for e in events if e.get("event_type") == EventType.ERROR.value]
-    assert len(error_events) == 1
-    payload = error_events[0]["payload"]
-    assert payload.get("message") == REDACTED_MARKER
-    assert payload.get("stack") == REDACTED_MARKER
-    assert payload.get("error_type") == "ValueError"
+def _raise_in_traced_run(message: str) -> None:
+    """Raise ValueError(message) inside a traced_run() block."""
+    with traced_run(name="failing_run"):
+        raise ValueError(message)
 
 
-def test_error_event_payload_redacted_context_manager(
-    temp_data_dir, redact_message_and_stack_env
+@pytest.mark.parametrize(
+    "invoke",
+    [_raise_in_trace_decorator, _raise_in_traced_run],
+    ids=["decorator", "context_manager"],
+)
+def test_error_event_payload_redacted(
+    memory_storage, monkeypatch, started_run_ids, invoke
 ):
-    """ERROR from traced_run() has message and stack redacted when redact_keys include message,stack."""
-    with pytest.raises(ValueError, match="secret in context"):
-        with traced_run(name="failing_run"):
-            raise ValueError("secret in context")
-
-    config = load_config()
-    runs = list_runs(limit=1, config=config)
-    assert runs
-    run_id = runs[0]["run_id"]
-    events = load_events(run_id, config)
+    """ERROR from @trace / traced_run() has message and stack redacted when redact_keys include message,stack."""
+    monkeypatch.setenv("MAIDA_REDACT_KEYS", "message,stack")
+    with pytest.raises(ValueError, match="API key sk-abc123 is invalid"):
+        invoke("API key sk-abc123 is invalid")
 
-    error_events = [e for e in events if e.get("event_type") == EventType.ERROR.value]
-    assert len(error_events) == 1
+    error_events = _only_run_events(started_run_ids, EventType.ERROR)
     payload = error_events[0]["payload"]
     assert payload.get("message") == REDACTED_MARKER
     assert payload.get("stack") == REDACTED_MARKER
+    assert payload.get("error_type") == "ValueError"
 
 
-def test_run_start_argv_redacted(temp_data_dir):
+def test_run_start_argv_redacted(memory_storage, started_run_ids):
     """RUN_START keeps argv but redacts only sensitive option values, e.g. --api-key=secret -> --api-key=__REDACTED__."""
     with patch("sys.argv", ["test_script.py", "--api-key=sk-secret-1234", "--verbose"]):
 
@@ -165,16 +130,7 @@ def test_run_start_argv_redacted(temp_data_dir):
 
         run_quiet()
 
-    config = load_config()
-    runs = list_runs(limit=1, config=config)
-    assert runs
-    run_id = runs[0]["run_id"]
-    events = load_events(run_id, config)
-
-    run_start_events = [
-        e for e in events if e.get("event_type") == EventType.RUN_START.value
-    ]
-    assert len(run_start_events) == 1
+    run_start_events = _only_run_events(started_run_ids, EventType.RUN_START)
     payload = run_start_events[0]["payload"]
     argv = payload.get("argv")
     assert isinstance(argv, list)
@@ -253,9 +209,10 @@ def test_redact_substring_match():
 
 
 def test_exception_message_secret_not_in_events_jsonl(
-    temp_data_dir, redact_message_and_stack_env
+    temp_data_dir, monkeypatch, started_run_ids
 ):
     """Secret in exception message must NOT appear anywhere in events.jsonl file content."""
+    monkeypatch.setenv("MAIDA_REDACT_KEYS", "message,stack")
     secret = "sk-leaked-api-key-xyz789"
     assert secret not in REDACTED_MARKER
 
@@ -267,9 +224,7 @@ def test_exception_message_secret_not_in_events_jsonl(
         run_that_leaks()
 
     config = load_config()
-    runs = list_runs(limit=1, config=config)
-    assert runs
-    run_id = runs[0]["run_id"]
+    run_id = started_run_ids[-1]
     events_path = config.data_dir / "runs" / run_id / "events.jsonl"
     raw_content = events_path.read_text(encoding="utf-8")
 
@@ -278,7 +233,7 @@ def test_exception_message_secret_not_in_events_jsonl(
     )
 
 
-def test_argv_api_key_not_in_events_jsonl(temp_data_dir):
+def test_argv_api_key_not_in_events_jsonl(temp_data_dir, started_run_ids):
     """argv containing --api-key=... must NOT appear in events.jsonl (value redacted or omitted)."""
     secret = "sk-secret-1234"
 
@@ -291,12 +246,50 @@ def test_argv_api_key_not_in_events_jsonl(temp_data_dir):
         run_quiet()
 
     config = load_config()
-    runs = list_runs(limit=1, config=config)
-    assert runs
-    run_id = runs[0]["run_id"]
+    run_id = started_run_ids[-1]
     events_path = config.data_dir / "runs" / run_id / "events.jsonl"
     raw_content = events_path.read_text(encoding="utf-8")
 
     assert secret not in raw_content, (
         f"API key value {secret!r} must not appear in events.jsonl"
     )
+
+
+def test_redact_keys_kept_as_given_and_matched_normalized():
+    """MaidaConfig keeps redact_keys as given; matching ignores case, padding and blanks."""
+    cfg = _redact_cfg([" API_Key ", "api_key", "", "Token"])
+    assert cfg.redact_keys == [" API_Key ", "api_key", "", "Token"]
+    out = _redact_and_truncate({"X-Api_Key": "sk", "MyToken": "t", "ok": 1}, cfg)
+    assert out == {"X-Api_Key": REDACTED_MARKER, "MyToken": REDACTED_MARKER, "ok": 1}
+
+
+def test_redact_keys_pattern_escapes_keys_and_handles_empty_list():
+    """Keys are matched literally (regex metacharacters escaped); no keys means nothing is redacted."""
+    cfg = _redact_cfg(["x.key", "a+b"])
+    out = _redact_and_truncate({"my_x.key": 1, "xykey": 2, "A+B": 3, "aab": 4}, cfg)
+    assert out == {
+        "my_x.key": REDACTED_MARKER,
+        "xykey": 2,
+        "A+B": REDACTED_MARKER,
+        "aab": 4,
+    }
+
+    empty = _redact_cfg([])
+    assert _redact_keys_pattern(empty) is None
+    assert _redact_and_truncate({"token": "t"}, empty) == {"token": "t"}
+
+
+def test_redaction_follows_redact_keys_changed_after_construction():
+    """Reassigning or mutating redact_keys on an existing config changes what is redacted."""
+    cfg = _redact_cfg(["token"])
+    cfg.redact_keys = ["secret"]
+    out = _redact_and_truncate({"token": "t", "my_secret": "s"}, cfg)
+    assert out == {"token": "t", "my_secret": REDACTED_MARKER}
+
+    cfg.redact_keys.append("Token")
+    out = _redact_and_truncate({"token": "t", "my_secret": "s"}, cfg)
+    assert out == {"token": REDACTED_MARKER, "my_secret": REDACTED_MARKER}
+
+    cfg.redact_keys.clear()
+    assert _redact_keys_pattern(cfg) is None
+    assert _redact_and_truncate({"token": "t"}, cfg) == {"token": "t"}
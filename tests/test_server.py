@@ -12,6 +12,18 @@ from maida.server import create_app
 from maida import storage
 
 
+@pytest.fixture(scope="module")
+def client(module_data_dir):
+    """One started app per module; config is read once, from the module's data dir."""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("MAIDA_DATA_DIR", str(module_data_dir))
+        app = create_app()
+    with TestClient(app) as c:
+        # Starlette builds its middleware stack on the first request; pay for it here.
+        c.get("/__warmup__")
+        yield c
+
+
 # ---------------------------------------------------------------------------
 # Validator: reject path traversal and invalid format
 # ---------------------------------------------------------------------------
@@ -34,6 +46,8 @@ def test_run_id_rejects_path_traversal_strings():
         "x" * 64,
         "00000000-0000-0000-0000-000000000001",  # UUID but v1, not v4
         "A0EEBC99-9C0B-4EF8-BB6D-6BB9BD380A11",  # valid v4 but not canonical (uppercase)
+        "a0eebc99-9c0b-4ef8-cb6d-6bb9bd380a11",  # version 4 nibble, but not RFC 4122 variant
+        "{a0eebc99-9c0b-4ef8-bb6d-6bb9bd380a11}",  # braces: uuid.UUID parses it
     ]
     for run_id in invalid:
         with pytest.raises(ValueError, match="invalid run_id"):
@@ -65,47 +79,52 @@ def test_run_id_accepts_valid_uuid_from_fixture(temp_data_dir):
 # ---------------------------------------------------------------------------
 
 
-def test_server_returns_400_for_invalid_run_id(temp_data_dir):
+def test_server_returns_400_for_invalid_run_id(client):
     """GET /api/runs/{run_id} with invalid run_id returns 400 (path traversal rejected by validator)."""
-    client = TestClient(create_app())
     r = client.get("/api/runs/not-a-uuid")
     assert r.status_code == 400
     assert "invalid run_id" in (r.json().get("detail") or "")
 
 
-def test_server_returns_400_for_invalid_run_id_events(temp_data_dir):
+def test_server_returns_400_for_invalid_run_id_events(client):
     """GET /api/runs/{run_id}/events with invalid run_id returns 400."""
-    client = TestClient(create_app())
     r = client.get("/api/runs/not-a-uuid/events")
     assert r.status_code == 400, r.json()
     assert "invalid run_id" in (r.json().get("detail") or "")
 
 
-def test_server_returns_404_for_valid_but_missing_run_id(temp_data_dir):
+def test_server_rejects_invalid_run_id_before_handler(client, mocker):
+    """The route's run_id pattern answers 400 without calling into storage."""
+    load_run_meta = mocker.patch.object(storage, "load_run_meta")
+    # v1 UUID: well-formed, but not the canonical v4 that storage accepts.
+    r = client.get("/api/runs/00000000-0000-0000-0000-000000000001")
+    assert r.status_code == 400
+    assert r.json() == {"detail": "invalid run_id"}
+    load_run_meta.assert_not_called()
+
+
+def test_server_returns_404_for_valid_but_missing_run_id(client):
     """Valid UUID but missing run directory returns 404."""
-    client = TestClient(create_app())
     r = client.get("/api/runs/a0eebc99-9c0b-4ef8-bb6d-6bb9bd380a11")
     assert r.status_code == 404
     assert "run not found" in (r.json().get("detail") or "")
 
 
-def test_server_returns_200_for_valid_run_id(temp_data_dir):
+def test_server_returns_200_for_valid_run_id(temp_data_dir, client):
     """Valid run_id with existing run returns 200 and metadata."""
     config = load_config()
     meta = storage.create_run(run_name="server_test", config=config)
     run_id = meta["run_id"]
-    client = TestClient(create_app())
     r = client.get(f"/api/runs/{run_id}")
     assert r.status_code == 200
     assert r.json().get("run_id") == run_id
 
 
-def test_server_paths_endpoint_returns_run_json_path(temp_data_dir):
+def test_server_paths_endpoint_returns_run_json_path(temp_data_dir, client):
     """GET /api/runs/{run_id}/paths returns local run.json path."""
     config = load_config()
     meta = storage.create_run(run_name="paths_test", config=config)
     run_id = meta["run_id"]
-    client = TestClient(create_app())
 
     r = client.get(f"/api/runs/{run_id}/paths")
     assert r.status_code == 200, r.text
@@ -115,10 +134,8 @@ def test_server_paths_endpoint_returns_run_json_path(temp_data_dir):
     assert paths.get("run_json") == meta["paths"]["run_json"]
 
 
-def test_server_paths_endpoint_invalid_and_missing_run_id(temp_data_dir):
+def test_server_paths_endpoint_invalid_and_missing_run_id(client):
     """Paths endpoint mirrors run meta semantics for invalid/missing IDs."""
-    client = TestClient(create_app())
-
     r = client.get("/api/runs/not-a-uuid/paths")
     assert r.status_code == 400
     assert "invalid run_id" in (r.json().get("detail") or "")
@@ -128,12 +145,11 @@ def test_server_paths_endpoint_invalid_and_missing_run_id(temp_data_dir):
     assert "run not found" in (r2.json().get("detail") or "")
 
 
-def test_server_can_rename_run(temp_data_dir):
+def test_server_can_rename_run(temp_data_dir, client):
     """POST /api/runs/{run_id}/rename updates run.json run_name on disk."""
     config = load_config()
     meta = storage.create_run(run_name="before", config=config)
     run_id = meta["run_id"]
-    client = TestClient(create_app())
 
     r = client.post(f"/api/runs/{run_id}/rename", json={"run_name": "after"})
     assert r.status_code == 200, r.text
@@ -146,10 +162,8 @@ def test_server_can_rename_run(temp_data_dir):
     assert reloaded["run_name"] == "after"
 
 
-def test_server_rename_invalid_and_missing_run_id(temp_data_dir):
+def test_server_rename_invalid_and_missing_run_id(client):
     """Rename endpoint validates run_id and missing runs."""
-    client = TestClient(create_app())
-
     r = client.post("/api/runs/not-a-uuid/rename", json={"run_name": "x"})
     assert r.status_code == 400
     assert "invalid run_id" in (r.json().get("detail") or "")
@@ -162,7 +176,7 @@ def test_server_rename_invalid_and_missing_run_id(temp_data_dir):
     assert "run not found" in (r2.json().get("detail") or "")
 
 
-def test_server_can_delete_run(temp_data_dir):
+def test_server_can_delete_run(temp_data_dir, client):
     """DELETE /api/runs/{run_id} removes the run directory."""
     config = load_config()
     meta = storage.create_run(run_name="to_delete", config=config)
@@ -170,8 +184,6 @@ def test_server_can_delete_run(temp_data_dir):
     run_dir = meta["paths"]["run_dir"]
     assert run_dir, "create_run should return run_dir path"
 
-    client = TestClient(create_app())
-
     r = client.delete(f"/api/runs/{run_id}")
     assert r.status_code == 204, r.text
 
@@ -181,10 +193,8 @@ def test_server_can_delete_run(temp_data_dir):
     assert not Path(run_dir).exists()
 
 
-def test_server_delete_invalid_and_missing_run_id(temp_data_dir):
+def test_server_delete_invalid_and_missing_run_id(client):
     """DELETE endpoint validates run_id and missing runs."""
-    client = TestClient(create_app())
-
     r = client.delete("/api/runs/not-a-uuid")
     assert r.status_code == 400
     assert "invalid run_id" in (r.json().get("detail") or "")
@@ -192,3 +202,80 @@ def test_server_delete_invalid_and_missing_run_id(temp_data_dir):
     r2 = client.delete("/api/runs/a0eebc99-9c0b-4ef8-bb6d-6bb9bd380a11")
     assert r2.status_code == 404
     assert "run not found" in (r2.json().get("detail") or "")
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_server_events_endpoint_same_body_with_and_without_orjson(
+    temp_data_dir, client, monkeypatch, use_orjson
+):
+    """GET /api/runs/{run_id}/events returns the same JSON whether or not orjson is used."""
+    import maida.server as server
+    from maida.events import EventType, new_event
+
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(server, "orjson", None)
+    config = load_config()
+    run_id = storage.create_run(run_name="events_test", config=config)["run_id"]
+    event = new_event(EventType.TOOL_CALL, run_id, "tool", {"args": {"q": "héllo"}})
+    storage.append_event(run_id, event, config)
+
+    r = client.get(f"/api/runs/{run_id}/events")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/json"
+    assert r.json() == {"spec_version": "0.1", "run_id": run_id, "events": [event]}
+
+
+def test_server_events_endpoint_returns_integers_wider_than_64_bits(
+    temp_data_dir, client
+):
+    """Events holding ints outside the 64-bit range (orjson refuses them) still return 200."""
+    from maida.events import EventType, new_event
+
+    config = load_config()
+    run_id = storage.create_run(run_name="wide_int_events", config=config)["run_id"]
+    state = {"pos": 2**70, "neg": -(2**63) - 1}
+    event = new_event(EventType.STATE_UPDATE, run_id, "state", {"state": state})
+    storage.append_event(run_id, event, config)
+
+    r = client.get(f"/api/runs/{run_id}/events")
+    assert r.status_code == 200
+    assert r.json()["events"][0]["payload"]["state"] == state
+
+
+@pytest.mark.parametrize(
+    "path", ["/", "/styles.css", "/app.js"], ids=["index", "styles", "app_js"]
+)
+def test_server_static_ui_revalidates_with_etag(client, path):
+    """Static UI files carry an ETag; a matching If-None-Match returns an empty 304."""
+    r = client.get(path)
+    assert r.status_code == 200
+    assert r.headers["cache-control"] == "no-cache"
+    etag = r.headers["etag"]
+
+    r2 = client.get(path, headers={"If-None-Match": etag})
+    assert r2.status_code == 304
+    assert r2.content == b""
+    assert r2.headers["etag"] == etag
+
+    r3 = client.get(path, headers={"If-None-Match": '"stale"'})
+    assert r3.status_code == 200
+    assert r3.content == r.content
+
+
+def test_importing_server_module_does_not_import_fastapi():
+    """maida.server defers FastAPI until create_app() is called."""
+    import subprocess
+    import sys
+
+    code = (
+        "import sys, maida.server\n"
+        "assert 'fastapi' not in sys.modules\n"
+        "maida.server.create_app()\n"
+        "assert 'fastapi' in sys.modules\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, timeout=30
+    )
+    assert result.returncode == 0, result.stderr
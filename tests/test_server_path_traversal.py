@@ -1,7 +1,7 @@
+import asyncio
 import urllib.parse
 
 import pytest
-from fastapi.testclient import TestClient
 
 import maida.server as server
 
@@ -14,6 +14,24 @@ def _get_app():
     raise AssertionError("maida.server must expose app or create_app().")
 
 
+@pytest.fixture(scope="session")
+def traversal_data_dir(tmp_path_factory):
+    """Data dir for the traversal probes; they only read, so one dir serves every test."""
+    return tmp_path_factory.mktemp("traversal_ro")
+
+
+@pytest.fixture(scope="module")
+def app(traversal_data_dir):
+    """
+    One app for the module; it reads config (MAIDA_DATA_DIR) once, when built.
+
+    Under xdist each worker process builds its own, so this is worker-safe.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("MAIDA_DATA_DIR", str(traversal_data_dir))
+        return _get_app()
+
+
 # Payloads that still fit in ONE path segment (so they definitely hit /api/runs/{run_id})
 SEGMENT_ONLY = [
     "not-a-uuid",
@@ -42,37 +60,63 @@ ENDPOINTS = [
     "/api/runs/{rid}/rename",
 ]
 
+# Quoted once per payload so each stays a single URL segment on the client side
+# (slashes encoded); literal %xx sequences are kept intact.
+MAY_BREAK_ROUTING_QUOTED = [urllib.parse.quote(r, safe="%") for r in MAY_BREAK_ROUTING]
+
+# Every endpoint x payload URL, built once at import.
+SEGMENT_ONLY_URLS = [e.format(rid=r) for e in ENDPOINTS for r in SEGMENT_ONLY]
+MAY_BREAK_ROUTING_URLS = [
+    e.format(rid=r) for e in ENDPOINTS for r in MAY_BREAK_ROUTING_QUOTED
+]
+
+
+async def _asgi_status(app, url):
+    """Dispatch one GET straight to the ASGI app and return the response status."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": urllib.parse.unquote(url),
+        "raw_path": url.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "server": ("testserver", 80),
+        "client": ("testclient", 50000),
+    }
+    status = None
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
 
-@pytest.mark.parametrize("rid_raw", SEGMENT_ONLY)
-@pytest.mark.parametrize("endpoint", ENDPOINTS)
-def test_traversal_like_run_ids_rejected_with_400(
-    monkeypatch, tmp_path, rid_raw, endpoint
-):
-    monkeypatch.setenv("MAIDA_DATA_DIR", str(tmp_path))
+    await app(scope, receive, send)
+    return status
 
-    app = _get_app()
-    client = TestClient(app)
 
-    # Keep literal % sequences intact in the URL we send.
-    rid = rid_raw
-    r = client.get(endpoint.format(rid=rid))
+async def _get_status_codes(app, urls):
+    """GET every URL concurrently through the ASGI app; return {url: status_code}."""
+    codes = await asyncio.gather(*(_asgi_status(app, url) for url in urls))
+    return dict(zip(urls, codes))
 
-    assert r.status_code == 400
 
+@pytest.mark.anyio
+async def test_traversal_like_run_ids_rejected_with_400(app):
+    status_codes = await _get_status_codes(app, SEGMENT_ONLY_URLS)
 
-@pytest.mark.parametrize("rid_raw", MAY_BREAK_ROUTING)
-@pytest.mark.parametrize("endpoint", ENDPOINTS)
-def test_traversal_payloads_never_succeed(monkeypatch, tmp_path, rid_raw, endpoint):
-    monkeypatch.setenv("MAIDA_DATA_DIR", str(tmp_path))
+    assert {url: code for url, code in status_codes.items() if code != 400} == {}
 
-    app = _get_app()
-    client = TestClient(app)
 
-    # Ensure it's a single URL segment on the client side (slashes encoded)
-    rid = urllib.parse.quote(
-        rid_raw, safe="%"
-    )  # keep any %xx sequences you already provided
-    r = client.get(endpoint.format(rid=rid))
+@pytest.mark.anyio
+async def test_traversal_payloads_never_succeed(app):
+    status_codes = await _get_status_codes(app, MAY_BREAK_ROUTING_URLS)
 
     # Depending on URL decoding + routing, this can be 400/404/422 — but must never be 200.
-    assert r.status_code != 200
+    assert {url: code for url, code in status_codes.items() if code == 200} == {}
@@ -1,29 +1,32 @@
 """
 Storage tests: create_run, append_event/load_events, finalize_run.
-Uses temp dir via MAIDA_DATA_DIR; env restored by fixture.
+Uses the `config` fixture (session defaults with data_dir in the module's temp dir).
 """
 
+import dataclasses
 import json
 from unittest.mock import patch
 
 import pytest
 
-from maida.config import load_config
+from maida import storage
 from maida.events import EventType, new_event
 from maida.storage import (
     append_event,
+    close_events_file,
     create_run,
     finalize_run,
+    load_event_types,
     load_events,
     load_run_meta,
     list_runs,
+    open_events_file,
     resolve_run_id,
 )
 
 
-def test_create_run_writes_run_json_with_status_running(temp_data_dir):
+def test_create_run_writes_run_json_with_status_running(config):
     """create_run writes run.json with status 'running'."""
-    config = load_config()
     meta = create_run("test_run", config)
     run_id = meta["run_id"]
     path = meta["paths"]["run_json"]
@@ -33,9 +36,8 @@ def test_create_run_writes_run_json_with_status_running(temp_data_dir):
     assert data.get("run_id") == run_id
 
 
-def test_append_event_writes_events_jsonl_load_events_reads_back(temp_data_dir):
+def test_append_event_writes_events_jsonl_load_events_reads_back(config):
     """append_event writes to events.jsonl and load_events reads it back."""
-    config = load_config()
     meta = create_run("test_run", config)
     run_id = meta["run_id"]
     ev = new_event(
@@ -48,9 +50,80 @@ def test_append_event_writes_events_jsonl_load_events_reads_back(temp_data_dir):
     assert loaded[0].get("payload", {}).get("tool_name") == "tool1"
 
 
-def test_finalize_run_sets_status_ok_ended_at_duration_ms(temp_data_dir):
+def test_load_events_types_returns_only_matching_event_types(config):
+    """load_events(types=...) and load_event_types see only each event's own event_type."""
+    meta = create_run("types_run", config)
+    run_id = meta["run_id"]
+    for event_type, payload in [
+        (EventType.RUN_START, {}),
+        # Mentions RUN_END only inside the payload; must not be returned.
+        (EventType.TOOL_CALL, {"result": "RUN_END", "event_type": "RUN_END"}),
+        (EventType.RUN_END, {"status": "ok"}),
+    ]:
+        append_event(run_id, new_event(event_type, run_id, "e", payload), config)
+
+    loaded = load_events(run_id, config, types={EventType.RUN_END.value})
+    assert [e["event_type"] for e in loaded] == [EventType.RUN_END.value]
+    assert loaded[0]["payload"] == {"status": "ok"}
+    assert load_events(run_id, config, types=()) == []
+    assert list(load_event_types(run_id, config)) == [
+        EventType.RUN_START.value,
+        EventType.TOOL_CALL.value,
+        EventType.RUN_END.value,
+    ]
+
+
+def test_append_event_uses_held_events_file_until_closed(config):
+    """Between open_events_file and close_events_file, appends go through one held file and are readable at once."""
+    meta = create_run("held_file_run", config)
+    run_id = meta["run_id"]
+    open_events_file(run_id, config)
+    held = storage._open_events_files[run_id]
+    append_event(run_id, new_event(EventType.RUN_START, run_id, "r", {}), config)
+    assert [e["event_type"] for e in load_events(run_id, config)] == ["RUN_START"]
+
+    close_events_file(run_id)
+    close_events_file(run_id)  # second close is a no-op
+    assert held[0].closed
+    assert run_id not in storage._open_events_files
+    append_event(run_id, new_event(EventType.RUN_END, run_id, "r", {}), config)
+    assert len(load_events(run_id, config)) == 2
+
+
+def test_append_event_falls_back_when_held_file_closed_concurrently(config, mocker):
+    """An append that looked up the held file just before close_events_file still lands on disk."""
+    meta = create_run("close_race_run", config)
+    run_id = meta["run_id"]
+    open_events_file(run_id, config)
+    held = storage._open_events_files[run_id]
+    close_events_file(run_id)
+    # The append's lookup ran before the close popped the entry.
+    mocker.patch.dict(storage._open_events_files, {run_id: held})
+
+    append_event(run_id, new_event(EventType.RUN_END, run_id, "r", {}), config)
+    assert [e["event_type"] for e in load_events(run_id, config)] == ["RUN_END"]
+
+
+@pytest.mark.parametrize("n", [2**70 + 1, -(2**63) - 1], ids=["positive", "negative"])
+@pytest.mark.parametrize("backend", ["file", "memory"])
+def test_append_event_round_trips_integers_wider_than_64_bits(
+    config, monkeypatch, backend, n
+):
+    """An integer outside the 64-bit range (orjson refuses it) is written and read back exactly."""
+    if backend == "memory":
+        monkeypatch.setattr(storage, "_memory_backends", {})
+        config = dataclasses.replace(config, storage="memory")
+    meta = create_run("wide_int_run", config)
+    run_id = meta["run_id"]
+    ev = new_event(EventType.STATE_UPDATE, run_id, "state", {"state": {"n": n}})
+    append_event(run_id, ev, config)
+    loaded = load_events(run_id, config)
+    got = loaded[0]["payload"]["state"]["n"]
+    assert type(got) is int and got == n
+
+
+def test_finalize_run_sets_status_ok_ended_at_duration_ms(config):
     """finalize_run sets status 'ok' and sets ended_at and duration_ms not None."""
-    config = load_config()
     meta = create_run("test_run", config)
     run_id = meta["run_id"]
     counts = {"llm_calls": 0, "tool_calls": 0, "errors": 0, "loop_warnings": 0}
@@ -92,9 +165,8 @@ def _write_run_json(run_dir, run_id: str, run_name: str, started_at: str) -> Non
     )
 
 
-def test_resolve_run_id_exact_match_returns_run_id(temp_data_dir):
+def test_resolve_run_id_exact_match_returns_run_id(config):
     """resolve_run_id with full run_id returns that run_id."""
-    config = load_config()
     runs_base = config.data_dir / "runs"
     runs_base.mkdir(parents=True, exist_ok=True)
     run_id = "a0eebc99-9c0b-4ef8-bb6d-6bb9bd380a11"
@@ -102,9 +174,8 @@ def test_resolve_run_id_exact_match_returns_run_id(temp_data_dir):
     assert resolve_run_id(run_id, config) == run_id
 
 
-def test_resolve_run_id_prefix_single_match_returns_full_run_id(temp_data_dir):
+def test_resolve_run_id_prefix_single_match_returns_full_run_id(config):
     """resolve_run_id with prefix matching exactly one run returns that run_id."""
-    config = load_config()
     runs_base = config.data_dir / "runs"
     runs_base.mkdir(parents=True, exist_ok=True)
     run_id = "b1ffcd00-0a1c-4ef8-bb6d-6bb9bd380a11"
@@ -113,10 +184,9 @@ def test_resolve_run_id_prefix_single_match_returns_full_run_id(temp_data_dir):
 
 
 def test_resolve_run_id_prefix_multiple_matches_returns_most_recent_by_started_at(
-    temp_data_dir,
+    config,
 ):
     """resolve_run_id with prefix matching multiple runs returns the most recent by started_at."""
-    config = load_config()
     runs_base = config.data_dir / "runs"
     runs_base.mkdir(parents=True, exist_ok=True)
     older_id = "c2aade11-1b2d-4ef8-bb6d-6bb9bd380a11"
@@ -126,9 +196,8 @@ def test_resolve_run_id_prefix_multiple_matches_returns_most_recent_by_started_a
     assert resolve_run_id("c2aade11", config) == newer_id
 
 
-def test_resolve_run_id_no_match_raises_file_not_found(temp_data_dir):
+def test_resolve_run_id_no_match_raises_file_not_found(config):
     """resolve_run_id with no matching run raises FileNotFoundError."""
-    config = load_config()
     runs_base = config.data_dir / "runs"
     runs_base.mkdir(parents=True, exist_ok=True)
     run_id = "d3bbef22-2c3e-7hi1-ee9g-9ee2eg613d44"
@@ -137,9 +206,8 @@ def test_resolve_run_id_no_match_raises_file_not_found(temp_data_dir):
         resolve_run_id("nonexistent", config)
 
 
-def test_resolve_run_id_rejects_path_traversal(temp_data_dir):
+def test_resolve_run_id_rejects_path_traversal(config):
     """resolve_run_id rejects prefix containing .. or path separators."""
-    config = load_config()
     runs_base = config.data_dir / "runs"
     runs_base.mkdir(parents=True, exist_ok=True)
     for bad in ["../foo", "a/b", "a\\b"]:
@@ -147,9 +215,8 @@ def test_resolve_run_id_rejects_path_traversal(temp_data_dir):
             resolve_run_id(bad, config)
 
 
-def test_resolve_run_id_empty_prefix_raises(temp_data_dir):
+def test_resolve_run_id_empty_prefix_raises(config):
     """resolve_run_id with empty or whitespace prefix raises FileNotFoundError."""
-    config = load_config()
     with pytest.raises(FileNotFoundError, match="Run ID is required"):
         resolve_run_id("", config)
     with pytest.raises(FileNotFoundError, match="Run ID is required"):
@@ -161,9 +228,10 @@ def test_resolve_run_id_empty_prefix_raises(temp_data_dir):
 # ---------------------------------------------------------------------------
 
 
-def test_list_runs_returns_runs_ordered_by_started_at_descending(temp_data_dir):
+def test_list_runs_returns_runs_ordered_by_started_at_descending(config, tmp_path):
     """list_runs returns runs ordered by started_at descending (most recent first)."""
-    config = load_config()
+    # Exact listing: use a private data dir, not the module-shared one.
+    config = dataclasses.replace(config, data_dir=tmp_path)
     runs_base = config.data_dir / "runs"
     runs_base.mkdir(parents=True, exist_ok=True)
     ids_and_times = [
@@ -187,9 +255,8 @@ def test_list_runs_returns_runs_ordered_by_started_at_descending(temp_data_dir):
 # ---------------------------------------------------------------------------
 
 
-def test_load_events_skips_invalid_json_lines(temp_data_dir):
+def test_load_events_skips_invalid_json_lines(config):
     """load_events skips corrupt/invalid JSON lines and returns only valid events."""
-    config = load_config()
     meta = create_run("corrupt_test", config)
     run_id = meta["run_id"]
     events_path = config.data_dir / "runs" / run_id / "events.jsonl"
@@ -204,9 +271,73 @@ def test_load_events_skips_invalid_json_lines(temp_data_dir):
     assert loaded[1].get("event_type") == "RUN_END"
 
 
-def test_load_events_logs_warning_for_corrupt_jsonl_lines(temp_data_dir):
+def test_load_events_reads_crlf_unterminated_and_non_utf8_lines(config):
+    """CRLF endings and a last line without newline are read; undecodable bytes are skipped."""
+    meta = create_run("line_endings", config)
+    run_id = meta["run_id"]
+    events_path = config.data_dir / "runs" / run_id / "events.jsonl"
+    start = json.dumps({"event_type": "RUN_START", "run_id": run_id}).encode()
+    end = json.dumps({"event_type": "RUN_END", "run_id": run_id}).encode()
+    events_path.write_bytes(start + b"\r\n\xff\xfe\n\n" + end)
+    loaded = load_events(run_id, config)
+    assert [e["event_type"] for e in loaded] == ["RUN_START", "RUN_END"]
+    assert load_events(run_id, config, types={"RUN_END"})[0]["event_type"] == "RUN_END"
+
+
+def test_load_events_reads_nan_and_infinity_tokens(config):
+    """NaN/Infinity tokens written by the stdlib encoder are read back, not dropped."""
+    meta = create_run("non_finite", config)
+    run_id = meta["run_id"]
+    events_path = config.data_dir / "runs" / run_id / "events.jsonl"
+    lines = [
+        json.dumps({"event_type": "RUN_START", "run_id": run_id}),
+        json.dumps({"event_type": "STATE_UPDATE", "payload": {"x": float("nan")}}),
+        json.dumps({"event_type": "STATE_UPDATE", "payload": {"x": float("-inf")}}),
+        json.dumps({"event_type": "RUN_END", "run_id": run_id}),
+    ]
+    events_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    loaded = load_events(run_id, config)
+    assert len(loaded) == 4
+    assert loaded[1]["payload"]["x"] != loaded[1]["payload"]["x"]  # NaN
+    assert loaded[2]["payload"]["x"] == float("-inf")
+
+
+def test_load_events_types_skips_lines_that_are_not_objects(config):
+    """With types, a line holding a JSON array or scalar is skipped, not an error."""
+    meta = create_run("non_object_lines", config)
+    run_id = meta["run_id"]
+    events_path = config.data_dir / "runs" / run_id / "events.jsonl"
+    start = json.dumps({"event_type": "RUN_START", "run_id": run_id})
+    events_path.write_text(
+        '["RUN_START"]\n"RUN_START"\n' + start + "\n", encoding="utf-8"
+    )
+    loaded = load_events(run_id, config, types={"RUN_START"})
+    assert loaded == [{"event_type": "RUN_START", "run_id": run_id}]
+
+
+def test_load_event_types_skips_what_load_events_skips(config):
+    """Corrupt lines, a partial trailing line and events without event_type yield nothing."""
+    meta = create_run("event_types_partial", config)
+    run_id = meta["run_id"]
+    events_path = config.data_dir / "runs" / run_id / "events.jsonl"
+    start = json.dumps({"event_type": "RUN_START", "run_id": run_id})
+    untyped = json.dumps({"run_id": run_id, "payload": {}})
+    events_path.write_text(
+        start
+        + '\n{"event_type": "ERROR" broken\n'
+        + untyped
+        + '\n{"event_type": "RUN_E',
+        encoding="utf-8",
+    )
+    assert [e.get("event_type") for e in load_events(run_id, config)] == [
+        "RUN_START",
+        None,
+    ]
+    assert list(load_event_types(run_id, config)) == ["RUN_START"]
+
+
+def test_load_events_logs_warning_for_corrupt_jsonl_lines(config):
     """load_events logs a warning for each skipped corrupt JSONL line."""
-    config = load_config()
     meta = create_run("corrupt_warn_test", config)
     run_id = meta["run_id"]
     events_path = config.data_dir / "runs" / run_id / "events.jsonl"
@@ -233,3 +364,65 @@ def test_load_events_logs_warning_for_corrupt_jsonl_lines(temp_data_dir):
     assert call2[0][1] == run_id
     assert call2[0][2] == 3
     assert isinstance(call2[0][3], json.JSONDecodeError)
+
+
+def test_memory_storage_round_trip_writes_nothing_to_disk(
+    memory_storage, temp_data_dir
+):
+    """MAIDA_STORAGE=memory serves the same storage API without touching data_dir."""
+    from maida.config import load_config
+    from maida.storage import delete_run, get_run_paths, rename_run
+
+    on_disk_before = set(temp_data_dir.rglob("*"))
+    config = load_config()
+    assert config.storage == "memory"
+    meta = create_run("mem_run", config)
+    run_id = meta["run_id"]
+    assert meta["paths"] == {"run_dir": None, "run_json": None, "events_jsonl": None}
+
+    ev = new_event(EventType.TOOL_CALL, run_id, "tool1", {"args": ("a", 1)})
+    append_event(run_id, ev, config)
+    loaded = load_events(run_id, config)
+    assert loaded[0]["payload"]["args"] == [
+        "a",
+        1,
+    ]  # JSON round-trip, like events.jsonl
+    loaded[0]["payload"]["args"].append("mutated")
+    assert load_events(run_id, config)[0]["payload"]["args"] == ["a", 1]
+    assert load_events(run_id, config, types={EventType.RUN_END.value}) == []
+    assert list(load_event_types(run_id, config)) == [EventType.TOOL_CALL.value]
+    append_event(run_id, {"run_id": run_id, "payload": {}}, config)  # no event_type
+    assert list(load_event_types(run_id, config)) == [EventType.TOOL_CALL.value]
+
+    finalize_run(run_id, "ok", {"tool_calls": 1}, config)
+    assert load_run_meta(run_id, config)["status"] == "ok"
+    assert [r["run_id"] for r in list_runs(limit=5, config=config)] == [run_id]
+    assert resolve_run_id(run_id[:8], config) == run_id
+    assert rename_run(run_id, "renamed", config)["run_name"] == "renamed"
+    assert get_run_paths(run_id, config)["run_json"] is None
+
+    delete_run(run_id, config)
+    with pytest.raises(FileNotFoundError):
+        load_run_meta(run_id, config)
+    with pytest.raises(ValueError, match="invalid run_id"):
+        load_events("../x", config)
+    assert set(temp_data_dir.rglob("*")) == on_disk_before
+
+
+def test_memory_storage_evicts_oldest_finished_run_when_full(
+    memory_storage, config, monkeypatch
+):
+    """A full in-memory store drops its oldest finished run; running runs are kept."""
+    monkeypatch.setattr(storage, "_MEMORY_MAX_RUNS", 2)
+    config = dataclasses.replace(config, storage="memory")
+    running = create_run("still_running", config)["run_id"]
+    finished = create_run("finished", config)["run_id"]
+    finalize_run(finished, "ok", {}, config)
+
+    newest = create_run("newest", config)["run_id"]
+    assert {r["run_id"] for r in list_runs(limit=10, config=config)} == {
+        running,
+        newest,
+    }
+    with pytest.raises(FileNotFoundError):
+        load_run_meta(finished, config)
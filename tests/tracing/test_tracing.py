@@ -4,6 +4,10 @@ and loop detection integration (repeated pattern triggers LOOP_WARNING exactly o
 Uses temp dir via MAIDA_DATA_DIR; env restored by fixture.
 """
 
+import subprocess
+import sys
+from collections import Counter
+
 import pytest
 
 from maida import (
@@ -14,10 +18,10 @@ from maida import (
     trace,
     traced_run,
 )
+from maida import storage
 from maida.config import load_config
 from maida.events import EventType
-from maida.storage import load_events, load_run_meta
-from tests.conftest import get_latest_run_id
+from maida.storage import load_event_types, load_events, load_run_meta
 
 
 @trace
@@ -30,37 +34,55 @@ def _traced_raises():
     raise ValueError("expected test error")
 
 
-def test_trace_success_one_run_start_one_run_end_run_json_ok(temp_data_dir):
+def test_trace_success_one_run_start_one_run_end_run_json_ok(
+    temp_data_dir, started_run_ids
+):
     """A @trace function writes exactly one RUN_START and one RUN_END; run.json status == 'ok'."""
     _traced_ok()
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
+    run_id = started_run_ids[-1]
     run_meta = load_run_meta(run_id, config)
 
-    run_starts = [e for e in events if e.get("event_type") == EventType.RUN_START.value]
-    run_ends = [e for e in events if e.get("event_type") == EventType.RUN_END.value]
-    assert len(run_starts) == 1
-    assert len(run_ends) == 1
+    counts = Counter(load_event_types(run_id, config))
+    assert counts[EventType.RUN_START.value] == 1
+    assert counts[EventType.RUN_END.value] == 1
     assert run_meta.get("status") == "ok"
 
 
-def test_trace_error_one_error_run_json_error_counts(temp_data_dir):
+def test_trace_error_one_error_run_json_error_counts(temp_data_dir, started_run_ids):
     """A @trace function raising ValueError writes exactly one ERROR; run.json status == 'error'; errors == 1."""
     with pytest.raises(ValueError, match="expected test error"):
         _traced_raises()
 
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
+    run_id = started_run_ids[-1]
     run_meta = load_run_meta(run_id, config)
 
-    errors = [e for e in events if e.get("event_type") == EventType.ERROR.value]
-    assert len(errors) == 1
+    counts = Counter(load_event_types(run_id, config))
+    assert counts[EventType.ERROR.value] == 1
     assert run_meta.get("status") == "error"
     assert run_meta.get("counts", {}).get("errors") == 1
 
 
+def test_run_json_written_only_at_run_start_and_end(
+    temp_data_dir, mocker, started_run_ids
+):
+    """run.json is written by create_run and finalize_run only, never per recorded event."""
+    writes = mocker.spy(storage, "_atomic_write_json")
+
+    @trace
+    def _run():
+        for i in range(5):
+            record_tool_call(f"tool_{i}", args={}, result="ok")
+            record_llm_call(f"model_{i}", prompt="p", response="r")
+
+    _run()
+    assert writes.call_count == 2
+    run_meta = load_run_meta(started_run_ids[-1], load_config())
+    assert run_meta["counts"]["tool_calls"] == 5
+    assert run_meta["counts"]["llm_calls"] == 5
+
+
 def test_has_active_run_false_outside_traced_run(temp_data_dir):
     """Public helper reports False when no explicit Maida run is active."""
     assert has_active_run() is False
@@ -85,18 +107,16 @@ def _traced_loop_pattern():
         record_llm_call("gpt", prompt="p", response="r")
 
 
-def test_loop_warning_emitted_once_for_repeated_pattern(temp_data_dir):
+def test_loop_warning_emitted_once_for_repeated_pattern(temp_data_dir, started_run_ids):
     """Repeated pattern (tool+llm x3) triggers exactly one LOOP_WARNING and counts.loop_warnings == 1."""
     _traced_loop_pattern()
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
+    run_id = started_run_ids[-1]
     run_meta = load_run_meta(run_id, config)
 
-    loop_warnings = [
-        e for e in events if e.get("event_type") == EventType.LOOP_WARNING.value
-    ]
-    assert len(loop_warnings) == 1
+    counts = Counter(load_event_types(run_id, config))
+    loop_warnings = load_events(run_id, config, types={EventType.LOOP_WARNING.value})
+    assert counts[EventType.LOOP_WARNING.value] == 1
     assert run_meta.get("counts", {}).get("loop_warnings") == 1
     payload = loop_warnings[0].get("payload", {})
     assert "TOOL_CALL:foo" in payload.get("pattern", "")
@@ -104,7 +124,9 @@ def test_loop_warning_emitted_once_for_repeated_pattern(temp_data_dir):
     assert payload.get("repetitions") == 3
 
 
-def test_tool_call_records_error_status_and_error_object_on_exception(temp_data_dir):
+def test_tool_call_records_error_status_and_error_object_on_exception(
+    temp_data_dir, started_run_ids
+):
     """Tool that raises records TOOL_CALL with status=error and error object (type, message)."""
 
     @trace
@@ -122,12 +144,10 @@ def test_tool_call_records_error_status_and_error_object_on_exception(temp_data_
 
     _run()
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
-    tool_events = [
-        e for e in events if e.get("event_type") == EventType.TOOL_CALL.value
-    ]
-    assert len(tool_events) >= 1
+    run_id = started_run_ids[-1]
+    counts = Counter(load_event_types(run_id, config))
+    tool_events = load_events(run_id, config, types={EventType.TOOL_CALL.value})
+    assert counts[EventType.TOOL_CALL.value] >= 1
     payload = tool_events[0].get("payload", {})
     assert payload.get("status") == "error"
     err = payload.get("error")
@@ -136,7 +156,9 @@ def test_tool_call_records_error_status_and_error_object_on_exception(temp_data_
     assert err.get("message") == "boom"
 
 
-def test_llm_call_records_error_status_and_error_object_on_exception(temp_data_dir):
+def test_llm_call_records_error_status_and_error_object_on_exception(
+    temp_data_dir, started_run_ids
+):
     """LLM call recorded with status=error and error=exception yields error object in payload."""
 
     @trace
@@ -151,10 +173,10 @@ def test_llm_call_records_error_status_and_error_object_on_exception(temp_data_d
 
     _run()
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
-    llm_events = [e for e in events if e.get("event_type") == EventType.LLM_CALL.value]
-    assert len(llm_events) >= 1
+    run_id = started_run_ids[-1]
+    counts = Counter(load_event_types(run_id, config))
+    llm_events = load_events(run_id, config, types={EventType.LLM_CALL.value})
+    assert counts[EventType.LLM_CALL.value] >= 1
     payload = llm_events[0].get("payload", {})
     assert payload.get("status") == "error"
     err = payload.get("error")
@@ -163,7 +185,7 @@ def test_llm_call_records_error_status_and_error_object_on_exception(temp_data_d
     assert "llm api failed" in str(err.get("message", ""))
 
 
-def test_success_calls_have_status_ok_and_no_error(temp_data_dir):
+def test_success_calls_have_status_ok_and_no_error(temp_data_dir, started_run_ids):
     """TOOL_CALL and LLM_CALL success paths have status=ok and error null/absent."""
 
     @trace
@@ -173,14 +195,12 @@ def test_success_calls_have_status_ok_and_no_error(temp_data_dir):
 
     _run()
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
-    tool_events = [
-        e for e in events if e.get("event_type") == EventType.TOOL_CALL.value
-    ]
-    llm_events = [e for e in events if e.get("event_type") == EventType.LLM_CALL.value]
-    assert len(tool_events) >= 1
-    assert len(llm_events) >= 1
+    run_id = started_run_ids[-1]
+    counts = Counter(load_event_types(run_id, config))
+    tool_events = load_events(run_id, config, types={EventType.TOOL_CALL.value})
+    llm_events = load_events(run_id, config, types={EventType.LLM_CALL.value})
+    assert counts[EventType.TOOL_CALL.value] >= 1
+    assert counts[EventType.LLM_CALL.value] >= 1
     tool_payload = tool_events[0].get("payload", {})
     llm_payload = llm_events[0].get("payload", {})
     assert tool_payload.get("status") == "ok"
@@ -189,7 +209,9 @@ def test_success_calls_have_status_ok_and_no_error(temp_data_dir):
     assert llm_payload.get("error") is None
 
 
-def test_record_llm_call_accepts_float_token_counts(temp_data_dir, monkeypatch):
+def test_record_llm_call_accepts_float_token_counts(
+    temp_data_dir, monkeypatch, started_run_ids
+):
     """record_llm_call with usage containing float token counts normalizes to integers (e.g. 100.0 -> 100)."""
     monkeypatch.setenv("MAIDA_REDACT", "0")  # so usage.*_tokens keys are not redacted
 
@@ -208,10 +230,10 @@ def test_record_llm_call_accepts_float_token_counts(temp_data_dir, monkeypatch):
 
     _run()
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
-    llm_events = [e for e in events if e.get("event_type") == EventType.LLM_CALL.value]
-    assert len(llm_events) >= 1
+    run_id = started_run_ids[-1]
+    counts = Counter(load_event_types(run_id, config))
+    llm_events = load_events(run_id, config, types={EventType.LLM_CALL.value})
+    assert counts[EventType.LLM_CALL.value] >= 1
     usage = llm_events[0].get("payload", {}).get("usage")
     assert usage is not None
     assert usage["prompt_tokens"] == 10
@@ -289,45 +311,44 @@ def test_trace_sets_name(monkeypatch, name, as_kwarg):
     assert captured["func"] is dummy_func
 
 
-def test_traced_run_success_one_run_start_one_run_end(temp_data_dir):
+def test_traced_run_success_one_run_start_one_run_end(temp_data_dir, started_run_ids):
     """traced_run(name=...) writes exactly one RUN_START and one RUN_END; run.json status == 'ok'."""
     with traced_run(name="my_agent_run"):
         pass
 
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
+    run_id = started_run_ids[-1]
     run_meta = load_run_meta(run_id, config)
 
-    run_starts = [e for e in events if e.get("event_type") == EventType.RUN_START.value]
-    run_ends = [e for e in events if e.get("event_type") == EventType.RUN_END.value]
-    assert len(run_starts) == 1
-    assert len(run_ends) == 1
+    counts = Counter(load_event_types(run_id, config))
+    run_start = load_events(run_id, config, types={EventType.RUN_START.value})[0]
+    assert counts[EventType.RUN_START.value] == 1
+    assert counts[EventType.RUN_END.value] == 1
     assert run_meta.get("status") == "ok"
     assert run_meta.get("run_name") == "my_agent_run"
-    assert run_starts[0].get("payload", {}).get("run_name") == "my_agent_run"
+    assert run_start.get("payload", {}).get("run_name") == "my_agent_run"
 
 
-def test_traced_run_error_one_error_run_json_error(temp_data_dir):
+def test_traced_run_error_one_error_run_json_error(temp_data_dir, started_run_ids):
     """traced_run with raised exception writes ERROR, RUN_END status=error, and re-raises."""
     with pytest.raises(ValueError, match="traced_run error"):
         with traced_run(name="failing_run"):
             raise ValueError("traced_run error")
 
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
+    run_id = started_run_ids[-1]
     run_meta = load_run_meta(run_id, config)
 
-    errors = [e for e in events if e.get("event_type") == EventType.ERROR.value]
-    run_ends = [e for e in events if e.get("event_type") == EventType.RUN_END.value]
-    assert len(errors) == 1
-    assert len(run_ends) == 1
+    counts = Counter(load_event_types(run_id, config))
+    assert counts[EventType.ERROR.value] == 1
+    assert counts[EventType.RUN_END.value] == 1
     assert run_meta.get("status") == "error"
     assert run_meta.get("counts", {}).get("errors") == 1
 
 
-def test_trace_system_exit_propagates_without_error_recorded(temp_data_dir):
+def test_trace_system_exit_propagates_without_error_recorded(
+    temp_data_dir, started_run_ids
+):
     """SystemExit inside @trace propagates immediately; no ERROR event or RUN_END is written."""
 
     @trace(name="sys_exit_run")
@@ -339,50 +360,54 @@ def test_trace_system_exit_propagates_without_error_recorded(temp_data_dir):
     assert exc_info.value.code == 42
 
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
-    errors = [e for e in events if e.get("event_type") == EventType.ERROR.value]
-    run_ends = [e for e in events if e.get("event_type") == EventType.RUN_END.value]
-    assert len(errors) == 0, "SystemExit must not be recorded as ERROR"
-    assert len(run_ends) == 0, "RUN_END must not be written on SystemExit (fast exit)"
+    run_id = started_run_ids[-1]
+    counts = Counter(load_event_types(run_id, config))
+    assert counts[EventType.ERROR.value] == 0, (
+        "SystemExit must not be recorded as ERROR"
+    )
+    assert counts[EventType.RUN_END.value] == 0, (
+        "RUN_END must not be written on SystemExit (fast exit)"
+    )
+    assert run_id not in storage._open_events_files, "events.jsonl left open"
 
 
-def test_traced_run_keyboard_interrupt_propagates_without_error_recorded(temp_data_dir):
+def test_traced_run_keyboard_interrupt_propagates_without_error_recorded(
+    temp_data_dir, started_run_ids
+):
     """KeyboardInterrupt inside traced_run propagates immediately; no ERROR event is written."""
     with pytest.raises(KeyboardInterrupt):
         with traced_run(name="kbd_run"):
             raise KeyboardInterrupt()
 
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
-    errors = [e for e in events if e.get("event_type") == EventType.ERROR.value]
-    assert len(errors) == 0, "KeyboardInterrupt must not be recorded as ERROR"
+    run_id = started_run_ids[-1]
+    counts = Counter(load_event_types(run_id, config))
+    assert counts[EventType.ERROR.value] == 0, (
+        "KeyboardInterrupt must not be recorded as ERROR"
+    )
 
 
-def test_traced_run_nested_does_not_create_new_run(temp_data_dir):
+def test_traced_run_nested_does_not_create_new_run(temp_data_dir, started_run_ids):
     """Nested traced_run uses the outer run; only one RUN_START and one RUN_END."""
     with traced_run(name="outer"):
         with traced_run(name="inner"):
             record_tool_call("nested_tool", args={}, result="ok")
 
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
-    run_starts = [e for e in events if e.get("event_type") == EventType.RUN_START.value]
-    run_ends = [e for e in events if e.get("event_type") == EventType.RUN_END.value]
-    tool_events = [
-        e for e in events if e.get("event_type") == EventType.TOOL_CALL.value
-    ]
-
-    assert len(run_starts) == 1
-    assert len(run_ends) == 1
-    assert run_starts[0].get("payload", {}).get("run_name") == "outer"
-    assert len(tool_events) == 1
+    assert len(started_run_ids) == 1
+    run_id = started_run_ids[0]
+    counts = Counter(load_event_types(run_id, config))
+    run_start = load_events(run_id, config, types={EventType.RUN_START.value})[0]
+    tool_events = load_events(run_id, config, types={EventType.TOOL_CALL.value})
+
+    assert counts[EventType.RUN_START.value] == 1
+    assert counts[EventType.RUN_END.value] == 1
+    assert run_start.get("payload", {}).get("run_name") == "outer"
+    assert counts[EventType.TOOL_CALL.value] == 1
     assert tool_events[0].get("payload", {}).get("tool_name") == "nested_tool"
 
 
-def test_trace_nested_decorated_uses_outer_run(temp_data_dir):
+def test_trace_nested_decorated_uses_outer_run(temp_data_dir, started_run_ids):
     """Nested @trace (inner decorated function called from outer) uses the outer run; only one RUN_START and one RUN_END."""
 
     @trace(name="outer_trace")
@@ -398,22 +423,22 @@ def test_trace_nested_decorated_uses_outer_run(temp_data_dir):
     outer()
 
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
-    run_starts = [e for e in events if e.get("event_type") == EventType.RUN_START.value]
-    run_ends = [e for e in events if e.get("event_type") == EventType.RUN_END.value]
-    tool_events = [
-        e for e in events if e.get("event_type") == EventType.TOOL_CALL.value
-    ]
+    run_id = started_run_ids[-1]
+    counts = Counter(load_event_types(run_id, config))
+    run_start = load_events(run_id, config, types={EventType.RUN_START.value})[0]
+    tool_events = load_events(run_id, config, types={EventType.TOOL_CALL.value})
     tool_names = [e.get("payload", {}).get("tool_name") for e in tool_events]
 
-    assert len(run_starts) == 1
-    assert len(run_ends) == 1
-    assert run_starts[0].get("payload", {}).get("run_name") == "outer_trace"
+    assert counts[EventType.RUN_START.value] == 1
+    assert counts[EventType.RUN_END.value] == 1
+    assert run_start.get("payload", {}).get("run_name") == "outer_trace"
     assert tool_names == ["outer_tool", "inner_tool", "after_inner"]
+    assert started_run_ids == [run_id]
 
 
-def test_record_state_inside_trace_writes_state_update_event(temp_data_dir):
+def test_record_state_inside_trace_writes_state_update_event(
+    temp_data_dir, started_run_ids
+):
     """record_state inside @trace writes one STATE_UPDATE with state and meta to storage."""
 
     @trace
@@ -424,19 +449,17 @@ def test_record_state_inside_trace_writes_state_update_event(temp_data_dir):
 
     _run()
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
-    state_events = [
-        e for e in events if e.get("event_type") == EventType.STATE_UPDATE.value
-    ]
-    assert len(state_events) == 1
+    run_id = started_run_ids[-1]
+    counts = Counter(load_event_types(run_id, config))
+    state_events = load_events(run_id, config, types={EventType.STATE_UPDATE.value})
+    assert counts[EventType.STATE_UPDATE.value] == 1
     payload = state_events[0].get("payload", {})
     assert payload.get("state") == {"step": 1, "query": "hello"}
     assert state_events[0].get("meta", {}).get("label") == "after_search"
     assert state_events[0].get("name") == "state"
 
 
-def test_record_state_with_diff(temp_data_dir):
+def test_record_state_with_diff(temp_data_dir, started_run_ids):
     """record_state with state and diff stores both in payload."""
 
     @trace
@@ -445,29 +468,25 @@ def test_record_state_with_diff(temp_data_dir):
 
     _run()
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
-    state_events = [
-        e for e in events if e.get("event_type") == EventType.STATE_UPDATE.value
-    ]
-    assert len(state_events) == 1
+    run_id = started_run_ids[-1]
+    counts = Counter(load_event_types(run_id, config))
+    state_events = load_events(run_id, config, types={EventType.STATE_UPDATE.value})
+    assert counts[EventType.STATE_UPDATE.value] == 1
     payload = state_events[0].get("payload", {})
     assert payload.get("state") == {"count": 2}
     assert payload.get("diff") == {"count": 1}
 
 
-def test_record_state_no_op_outside_trace(temp_data_dir):
+def test_record_state_no_op_outside_trace(temp_data_dir, started_run_ids):
     """record_state with no active run does not create a run or write events."""
     with traced_run(name="only_run"):
         pass
     record_state(state={"orphan": True})
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
-    state_events = [
-        e for e in events if e.get("event_type") == EventType.STATE_UPDATE.value
-    ]
-    assert len(state_events) == 0
+    assert len(started_run_ids) == 1
+    run_id = started_run_ids[0]
+    counts = Counter(load_event_types(run_id, config))
+    assert counts[EventType.STATE_UPDATE.value] == 0
 
 
 # ---------------------------------------------------------------------------
@@ -475,7 +494,7 @@ def test_record_state_no_op_outside_trace(temp_data_dir):
 # ---------------------------------------------------------------------------
 
 
-def test_trace_async_function_records_events(temp_data_dir):
+def test_trace_async_function_records_events(temp_data_dir, started_run_ids):
     """@trace on an async function should record events inside the coroutine body."""
     import asyncio
 
@@ -487,8 +506,7 @@ def test_trace_async_function_records_events(temp_data_dir):
     asyncio.run(async_run())
 
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
+    run_id = started_run_ids[-1]
     run_meta = load_run_meta(run_id, config)
 
     assert run_meta["status"] == "ok"
@@ -496,14 +514,14 @@ def test_trace_async_function_records_events(temp_data_dir):
     assert run_meta["counts"]["llm_calls"] == 1
     assert run_meta["counts"]["tool_calls"] == 1
 
-    event_types = [e.get("event_type") for e in events]
+    event_types = list(load_event_types(run_id, config))
     assert "RUN_START" in event_types
     assert "LLM_CALL" in event_types
     assert "TOOL_CALL" in event_types
     assert event_types[-1] == "RUN_END"
 
 
-def test_trace_async_function_records_error(temp_data_dir):
+def test_trace_async_function_records_error(temp_data_dir, started_run_ids):
     """@trace on an async function that raises should record ERROR + RUN_END(error)."""
     import asyncio
 
@@ -516,17 +534,17 @@ def test_trace_async_function_records_error(temp_data_dir):
         asyncio.run(async_fail())
 
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
+    run_id = started_run_ids[-1]
     run_meta = load_run_meta(run_id, config)
 
     assert run_meta["status"] == "error"
-    errors = [e for e in events if e.get("event_type") == EventType.ERROR.value]
-    assert len(errors) == 1
+    counts = Counter(load_event_types(run_id, config))
+    errors = load_events(run_id, config, types={EventType.ERROR.value})
+    assert counts[EventType.ERROR.value] == 1
     assert "async boom" in errors[0]["payload"]["message"]
 
 
-def test_trace_async_with_guardrails(temp_data_dir):
+def test_trace_async_with_guardrails(temp_data_dir, started_run_ids):
     """Guardrails work correctly on @trace-decorated async functions."""
     import asyncio
 
@@ -542,12 +560,23 @@ def test_trace_async_with_guardrails(temp_data_dir):
         asyncio.run(async_loop())
 
     config = load_config()
-    run_id = get_latest_run_id(config)
-    events = load_events(run_id, config)
+    run_id = started_run_ids[-1]
     run_meta = load_run_meta(run_id, config)
 
     assert run_meta["status"] == "error"
-    loop_warnings = [
-        e for e in events if e.get("event_type") == EventType.LOOP_WARNING.value
-    ]
-    assert len(loop_warnings) >= 1
+    counts = Counter(load_event_types(run_id, config))
+    assert counts[EventType.LOOP_WARNING.value] >= 1
+
+
+def test_import_maida_defers_tracing_until_first_use():
+    """`import maida` does not load maida.tracing; accessing maida.trace loads it."""
+    code = (
+        "import sys, maida\n"
+        "assert 'maida.tracing' not in sys.modules\n"
+        "assert callable(maida.trace)\n"
+        "assert 'maida.tracing' in sys.modules\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, timeout=30
+    )
+    assert result.returncode == 0, result.stderr